@@ -3,6 +3,7 @@ import tempfile
 import os
 from pathlib import Path
 from src.document_scanner import scan_and_summarize
+from src.llm_scheduler import format_queue_stats, get_scheduler
 import time
 
 # Page configuration
@@ -86,13 +87,35 @@ with st.sidebar:
     model_options = [
         "gemini-2.5-flash",
         "gemini-1.5-flash",
-        "gemini-1.5-pro"
+        "gemini-1.5-pro",
+        "local-textrank",
+        "local-tfidf"
     ]
     model_name = st.selectbox(
         "Select LLM Model",
         options=model_options,
         index=0,
-        help="Choose the Google Gemini model for summarization"
+        help="Choose the Google Gemini model for summarization, "
+             "or a local extractive summarizer that works offline"
+    )
+    
+    # Local models run the extractive backend; the suffix is the scoring method
+    if model_name.startswith("local-"):
+        backend = "extractive"
+        model_name = model_name[len("local-"):]
+        prefilter = False
+    else:
+        backend = "gemini"
+        prefilter = st.checkbox(
+            "Pre-filter Text Locally",
+            value=False,
+            help="Send only the most salient half of the sentences to Gemini (faster, cheaper)"
+        )
+    
+    incremental = st.checkbox(
+        "Incremental Re-processing",
+        value=False,
+        help="Remember pages of previously processed files; re-submitted files only re-process changed pages"
     )
     
     # Save options
@@ -142,9 +165,9 @@ st.markdown("---")
 st.subheader("📁 Upload Documents")
 uploaded_files = st.file_uploader(
     "Choose files to process (PDF, Images)",
-    type=["pdf", "png", "jpg", "jpeg", "bmp", "tiff", "webp"],
+    type=["pdf", "png", "jpg", "jpeg", "bmp", "tiff", "webp", "zip", "tar", "gz", "tgz"],
     accept_multiple_files=True,
-    help="You can upload multiple files at once"
+    help="You can upload multiple files at once, or ZIP/tar bundles of them"
 )
 
 # Display uploaded files
@@ -169,18 +192,11 @@ if process_button and uploaded_files:
     with tempfile.TemporaryDirectory() as temp_dir:
         try:
             temp_dir = os.mkdir("output_dir") if not os.path.exists("output_dir") else "output_dir"
-            # Save uploaded files to temporary directory
-            temp_file_paths = []
-            
-            with st.spinner("📤 Uploading files..."):
-                for uploaded_file in uploaded_files:
-                    temp_file_path = os.path.join(temp_dir, uploaded_file.name)
-                    with open(temp_file_path, "wb") as f:
-                        f.write(uploaded_file.getbuffer())
-                    temp_file_paths.append(temp_file_path)
-                time.sleep(0.5)  # Brief pause for user feedback
+            # Uploaded files (and archive members) are read straight from memory
+            for uploaded_file in uploaded_files:
+                uploaded_file.seek(0)
             
-            st.success(f"✅ {len(temp_file_paths)} file(s) uploaded successfully")
+            st.success(f"✅ {len(uploaded_files)} file(s) uploaded successfully")
             
             # Progress bar
             progress_bar = st.progress(0)
@@ -206,11 +222,15 @@ if process_button and uploaded_files:
             
             # Run the pipeline
             extracted_text, summary = scan_and_summarize(
-                input_paths=temp_file_paths,
+                input_paths=list(uploaded_files),
                 use_preprocess=use_preprocess,
                 model_name=model_name,
                 save_text=save_text_path,
-                save_summary=save_summary_path
+                save_summary=save_summary_path,
+                priority="interactive",
+                backend=backend,
+                prefilter_ratio=0.5 if prefilter else None,
+                manifest_dir=os.path.join(temp_dir, "manifests") if incremental else None
             )
             
             # Step 3: Complete
@@ -285,6 +305,10 @@ if process_button and uploaded_files:
                     with col2:
                         st.metric("Summary Words", f"{summary_word_count:,}")
                     
+                    if backend == "gemini":
+                        # LLM queue wait times (this app process, all sessions)
+                        st.caption("⏱️ LLM queue: " + format_queue_stats(get_scheduler().queue_stats()).replace("\n", " | "))
+                    
                     # Download button
                     st.download_button(
                         label="⬇️ Download Summary",
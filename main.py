@@ -1,5 +1,7 @@
 from pathlib import Path
-from src.document_scanner import scan_and_summarize
+from src.document_scanner import query_and_summarize, scan_and_summarize
+from src.watcher import watch_folders
+from src.llm_scheduler import format_queue_stats, get_scheduler
 import os
 import time
 
@@ -13,10 +15,55 @@ def main():
     output_dir = os.mkdir("output_dir") if not os.path.exists("output_dir") else "output_dir"
     print("Output directory:", output_dir)
     use_preprocess = False  # Set to True to enable image preprocessing
-    model_name = "gemini-2.5-flash"
+    backend = "gemini"  # "gemini" or "extractive" (local, no network)
+    model_name = "gemini-2.5-flash"  # for "extractive": "textrank" or "tfidf"
+    prefilter_ratio = None  # e.g. 0.5 to send only the most salient half of the text to the LLM
+    token_budget = None  # Set to a token count to cap LLM usage for this run
+    manifest_dir = os.path.join(output_dir, "manifests")  # Set to None to always reprocess everything
+    index_path = os.path.join(output_dir, "text_index.sqlite")  # Full-text index of extracted pages (None to disable)
+    query = None  # e.g. "payment terms": summarize matching pages from the index instead of scanning
+    watch = False  # Set to True to keep watching input_paths and process new/changed files as they arrive
     save_text = os.path.join(output_dir,f"text_{int(time.time()*1000)}.txt") # Set to filename to save extracted text
     save_summary = os.path.join(output_dir,f"summary_{int(time.time()*1000)}.txt")  # Set to filename to save summary
     try:
+        if watch:
+            # Watch mode: per-file outputs in output_dir, runs until Ctrl+C
+            watch_folders(
+                input_paths,
+                output_dir,
+                max_workers=2,
+                use_preprocess=use_preprocess,
+                model_name=model_name,
+                priority="batch",
+                token_budget=token_budget,
+                backend=backend,
+                prefilter_ratio=prefilter_ratio,
+                manifest_dir=manifest_dir,
+                index_path=index_path
+            )
+            return
+        
+        if query:
+            # Query mode: answer from the index, no extraction
+            retrieved_text, summary = query_and_summarize(
+                query=query,
+                index_path=index_path,
+                model_name=model_name,
+                backend=backend,
+                priority="batch",
+                token_budget=token_budget,
+                save_summary=save_summary
+            )
+            print("\n" + "="*50)
+            print(f"SUMMARY FOR QUERY: {query}")
+            print("="*50)
+            print(summary)
+            print("="*50 + "\n")
+            if backend == "gemini":
+                print("LLM queue wait times:")
+                print(format_queue_stats(get_scheduler().queue_stats()))
+            return
+        
         print(f"Processing: {input_paths}")
         
         # Run the document scanner pipeline
@@ -25,7 +72,13 @@ def main():
             use_preprocess=use_preprocess,
             model_name=model_name,
             save_text=save_text,
-            save_summary=save_summary
+            save_summary=save_summary,
+            priority="batch",
+            token_budget=token_budget,
+            backend=backend,
+            prefilter_ratio=prefilter_ratio,
+            manifest_dir=manifest_dir,
+            index_path=index_path
         )
         
         # Display results
@@ -39,6 +92,9 @@ def main():
         print("="*50)
         print(summary)
         print("="*50 + "\n")
+        if backend == "gemini":
+            print("LLM queue wait times:")
+            print(format_queue_stats(get_scheduler().queue_stats()))
         print("Document scanning completed successfully")
         
     except Exception as e:
@@ -1,61 +1,198 @@
-from typing import List, Optional, Tuple
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from pathlib import Path
 
-from src.io_utils import images_from_paths
-from src.pdf_extractor import extract_text_from_pdf, has_extractable_text
-from src.preprocess import preprocess_for_ocr
-from src.ocr import ocr_images
-from src.summarizer import summarize_with_gemini
+from src.io_utils import (
+    ARCHIVE_EXTENSIONS,
+    images_from_pdf_pages,
+    is_archive,
+    iter_archive_members,
+    iter_images_from_bytes,
+    iter_images_from_paths,
+    sniff_stream,
+)
+from src.pdf_extractor import (
+    analyze_pdf,
+    extract_pages_text,
+    extract_pdf_text_pages,
+    format_pdf_pages,
+)
+from src.preprocess import RESIZE_MAX, preprocess_for_ocr
+from src.ocr import TILE_THRESHOLD, ocr_images
+from src.summarizer import SummarizerBackend, chunk_pages, get_backend
+from src.llm_scheduler import PRIORITY_BATCH
+from src.manifest import PageManifest, bytes_hash, file_hash
+from src.text_index import TextIndex
 
 
+SUPPORTED_EXTS = (".pdf", ".png", ".jpg", ".jpeg", ".bmp", ".tiff", ".webp")
+# Documents plus ZIP/tar bundles of them (read in memory, never unpacked to disk)
+INPUT_EXTS = SUPPORTED_EXTS + ARCHIVE_EXTENSIONS
+# Archive members / uploaded streams extracted concurrently
+MEMBER_WORKERS = min(4, os.cpu_count() or 1)
+
+# A document is (name, bytes) when it lives in memory, (path, None) when on disk
+Document = Tuple[str, Optional[bytes]]
+# Streams have no path: their documents are named 'stream:<name>' so a re-upload
+# keeps its manifest and cannot collide with '<cwd>/<name>' on disk; the content
+# hash is only the index file_hash
+STREAM_PREFIX = "stream:"
 
 
 def get_file_paths(inputs: List[str]) -> List[str]:
     """
     Expand input paths to individual files.
-    Handles folders by collecting all supported files inside.
+    Handles folders by collecting all supported files (and archives) inside.
     """
-    SUPPORTED_EXTS = (".pdf", ".png", ".jpg", ".jpeg", ".bmp", ".tiff", ".webp")
     files = []
     
     for inp in inputs:
         path = Path(inp)
+        # endswith, not Path.suffix: '.tar.gz' has suffix '.gz'
         if path.is_dir():
             for file in sorted(path.iterdir()):
-                if file.suffix.lower() in SUPPORTED_EXTS:
+                if file.name.lower().endswith(INPUT_EXTS):
                     files.append(str(file))
         elif path.is_file():
-            if path.suffix.lower() in SUPPORTED_EXTS:
+            if path.name.lower().endswith(INPUT_EXTS):
                 files.append(str(path))
     
     return files
 
 
-def extract_text_from_files(file_paths: List[str], use_preprocess: bool = True) -> str:
+def iter_in_memory_documents(archives: Iterable[str],
+                             streams: Iterable[BinaryIO] = ()) -> Iterator[Tuple[str, bytes]]:
+    """
+    Lazily yield (name, bytes) for every supported document inside the given
+    archive files and binary streams (e.g. uploads). A stream is itself an
+    archive or a single document, told apart by its content (see sniff_stream).
+    Archive members are named '<archive>/<member>'; documents from streams
+    get the STREAM_PREFIX namespace.
+    """
+    for archive in archives:
+        for member, data in iter_archive_members(archive, SUPPORTED_EXTS):
+            yield f"{archive}/{member}", data
+
+    for n, stream in enumerate(streams, 1):
+        name = getattr(stream, "name", None)
+        name = name if isinstance(name, str) and name else f"stream-{n}"
+        kind, stream = sniff_stream(stream)
+        if kind in ("zip", "tar"):
+            for member, data in iter_archive_members(stream, SUPPORTED_EXTS):
+                yield f"{STREAM_PREFIX}{name}/{member}", data
+        elif kind in ("pdf", "image"):
+            data = stream.read()
+            # Downstream handling is chosen by extension
+            if kind == "pdf" and not name.lower().endswith(".pdf"):
+                name += ".pdf"
+            elif kind == "image" and name.lower().endswith(".pdf"):
+                name = name[:-len(".pdf")]
+            yield f"{STREAM_PREFIX}{name}", data
+        else:
+            print(f"Skipping unsupported stream: {name}")
+
+
+def _document_key(name: str) -> str:
+    """
+    Stable identity of a document for manifests and the index: the absolute
+    path on disk, or the namespaced name of an in-memory stream document.
+    """
+    return name if name.startswith(STREAM_PREFIX) else os.path.abspath(name)
+
+
+def _map_in_order(fn: Callable, items: Iterable, max_workers: int = MEMBER_WORKERS) -> Iterator:
     """
-    Extract text from a list of files (PDFs and images).
+    Apply fn to items on a thread pool and yield results in input order.
+    Items are pulled lazily with at most two per worker in flight, so
+    archive members are processed while the archive is still being read
+    and only a bounded number of them is held in memory.
+    """
+    if max_workers < 2:
+        for item in items:
+            yield fn(item)
+        return
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        in_flight = deque()
+        for item in items:
+            in_flight.append(pool.submit(fn, item))
+            if len(in_flight) >= 2 * max_workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def image_load_options(use_preprocess: bool) -> Dict:
+    """
+    Decode settings derived from the OCR pixel budget. With preprocessing on,
+    images are shrunk to RESIZE_MAX and binarized anyway, so they can be
+    decoded at reduced scale and straight to grayscale; images large enough
+    to be tiled keep full resolution. Without preprocessing, images go to
+    Tesseract untouched (oversized ones still go to tiled OCR undecoded).
+    """
+    if not use_preprocess:
+        return {"full_res_above": TILE_THRESHOLD}
+    return {"max_side": RESIZE_MAX, "grayscale": True, "full_res_above": TILE_THRESHOLD}
+
+
+def extract_text_from_bytes(name: str, data: bytes, use_preprocess: bool = True) -> str:
+    """
+    extract_text_from_files for one in-memory document (archive member or
+    uploaded stream): PDFs are opened from the bytes, images decoded from them.
+    """
+    preprocess_fn = preprocess_for_ocr if use_preprocess else None
+    if name.lower().endswith('.pdf'):
+        try:
+            native, pages = extract_pdf_text_pages(data)
+        except Exception as e:
+            print(f"Failed to read PDF: {name}: {e}")
+            native, pages = False, {}
+        if native:
+            print(f"  -> {name}: using native PDF text extraction")
+            return format_pdf_pages(sorted(pages.items()))
+        print(f"  -> {name}: PDF has no extractable text, using OCR")
+        images = iter_images_from_bytes(name, data, grayscale=use_preprocess)
+    else:
+        images = iter_images_from_bytes(name, data, **image_load_options(use_preprocess))
+    return ocr_images(images, preprocess_fn=preprocess_fn)
+
+
+def extract_text_from_files(file_paths: List[str], use_preprocess: bool = True,
+                            streams: Iterable[BinaryIO] = ()) -> str:
+    """
+    Extract text from a list of files (PDFs, images and archives of them)
+    and from binary streams.
     For PDFs: tries native text extraction first, falls back to OCR if needed.
     For images: uses OCR with optional preprocessing.
+    Archive members and streams are read in memory and extracted in parallel.
     """
     all_text = []
+    streams = list(streams)
     
+    archives = [f for f in file_paths if is_archive(f)]
     pdf_files = [f for f in file_paths if f.lower().endswith('.pdf')]
-    image_files = [f for f in file_paths if not f.lower().endswith('.pdf')]
+    image_files = [f for f in file_paths if not f.lower().endswith('.pdf') and not is_archive(f)]
     
     # Handle PDFs
     for pdf_path in pdf_files:
         print(f"Processing PDF: {pdf_path}")
         
-        # Try native text extraction first
-        if has_extractable_text(pdf_path):
+        # Try native text extraction first (classified and extracted in one open)
+        try:
+            native, pages = extract_pdf_text_pages(pdf_path)
+        except Exception as e:
+            print(f"Failed to read PDF: {pdf_path}: {e}")
+            native, pages = False, {}
+        if native:
             print("  -> Using native PDF text extraction")
-            text = extract_text_from_pdf(pdf_path)
+            text = format_pdf_pages(sorted(pages.items()))
             if text.strip():
                 all_text.append(text)
         else:
             # Fall back to OCR
             print("  -> PDF has no extractable text, using OCR")
-            images = images_from_paths([pdf_path])
+            images = iter_images_from_paths([pdf_path], **image_load_options(use_preprocess))
             preprocess_fn = preprocess_for_ocr if use_preprocess else None
             text = ocr_images(images, preprocess_fn=preprocess_fn)
             if text.strip():
@@ -64,52 +201,238 @@ def extract_text_from_files(file_paths: List[str], use_preprocess: bool = True)
     # Handle images
     if image_files:
         print(f"Processing {len(image_files)} image(s) with OCR")
-        images = images_from_paths(image_files)
+        # Streamed frame by frame, decoded at the OCR pixel budget
+        images = iter_images_from_paths(image_files, **image_load_options(use_preprocess))
         preprocess_fn = preprocess_for_ocr if use_preprocess else None
         text = ocr_images(images, preprocess_fn=preprocess_fn)
         if text.strip():
             all_text.append(text)
     
+    # Handle archive members and streams
+    if archives or streams:
+        print(f"Processing {len(archives)} archive(s) and {len(streams)} stream(s) in memory")
+        documents = iter_in_memory_documents(archives, streams)
+        for text in _map_in_order(lambda doc: extract_text_from_bytes(*doc, use_preprocess), documents):
+            if text.strip():
+                all_text.append(text)
+    
     return "\n\n".join(all_text)
 
 
+def extract_pages_incremental(file_path: str, manifest: PageManifest,
+                              use_preprocess: bool = True,
+                              data: Optional[bytes] = None) -> Tuple[str, List[str]]:
+    """
+    Per-page text for one file, re-extracting only pages whose content hash
+    is not in the manifest. Updates the manifest's pages.
+    With data, the document is read from those bytes and file_path is only its name.
+    Returns (mode, page_texts) where mode is 'native' or 'ocr'.
+    """
+    preprocess_fn = preprocess_for_ocr if use_preprocess else None
+    ocr_settings = {"use_preprocess": use_preprocess}
+    source = file_path if data is None else data
+
+    if file_path.lower().endswith('.pdf'):
+        native, hashes = analyze_pdf(source)
+        mode = "native" if native else "ocr"
+        settings = {} if native else ocr_settings
+    else:
+        mode = "ocr"
+        settings = ocr_settings
+        hashes = [file_hash(file_path) if data is None else bytes_hash(data)]
+
+    known = manifest.reusable_texts(mode, settings)
+    changed = [i for i, h in enumerate(hashes) if h not in known]
+    print(f"  -> {len(changed)} of {len(hashes)} page(s) changed since last run")
+
+    fresh: Dict[int, str] = {}
+    if changed:
+        if mode == "native":
+            fresh = extract_pages_text(source, changed)
+        elif file_path.lower().endswith('.pdf'):
+            page_images = images_from_pdf_pages(source, changed, grayscale=use_preprocess)
+            fresh = {n: ocr_images([img], preprocess_fn=preprocess_fn) for n, img in page_images.items()}
+        else:
+            if data is None:
+                images = iter_images_from_paths([file_path], **image_load_options(use_preprocess))
+            else:
+                images = iter_images_from_bytes(file_path, data, **image_load_options(use_preprocess))
+            fresh = {0: ocr_images(images, preprocess_fn=preprocess_fn)}
+
+    texts = [fresh.get(i, "") if i in fresh else known.get(h, "") for i, h in enumerate(hashes)]
+    manifest.update_pages(mode, settings, hashes, texts)
+    return mode, texts
+
+
+def _iter_documents(files: List[str], streams: Iterable[BinaryIO] = ()) -> Iterator[Document]:
+    """
+    On-disk files as (path, None), then archive members and streams as (name, bytes).
+    """
+    for file_path in files:
+        if not is_archive(file_path):
+            yield file_path, None
+    yield from iter_in_memory_documents([f for f in files if is_archive(f)], streams)
+
+
+def scan_and_summarize_pages(
+    files: List[str],
+    summarizer: SummarizerBackend,
+    use_preprocess: bool = True,
+    manifest_dir: Optional[str] = None,
+    index: Optional[TextIndex] = None,
+    streams: Iterable[BinaryIO] = ()
+) -> Tuple[str, str]:
+    """
+    Page-level pipeline.
+    With manifest_dir: only changed pages are re-extracted, only chunks
+    containing them are re-summarized, then the final combine is redone.
+    With index: per-page text is added to the full-text index.
+    Documents (archive members included) are extracted in parallel;
+    indexing and chunking happen in input order.
+    Returns: (extracted_text, summary)
+    """
+    manifests = []
+    all_text = []
+    all_chunks = []
+    summary_cache: Dict[str, str] = {}
+    doc_chunks = []
+
+    def extract(doc: Document):
+        file_path, data = doc
+        print(f"Processing: {file_path}")
+        try:
+            if manifest_dir:
+                manifest = PageManifest.load(manifest_dir, _document_key(file_path))
+            else:
+                manifest = PageManifest(None, _document_key(file_path))
+            mode, page_texts = extract_pages_incremental(file_path, manifest,
+                                                         use_preprocess=use_preprocess, data=data)
+            doc_hash = file_hash(file_path) if data is None else bytes_hash(data)
+        except Exception as e:
+            # Corrupt/encrypted documents are skipped, not fatal for the whole run
+            print(f"Failed to process {file_path}: {e}")
+            return None
+        return file_path, doc_hash, manifest, mode, page_texts
+
+    for result in _map_in_order(extract, _iter_documents(files, streams)):
+        if result is None:
+            continue
+        file_path, doc_hash, manifest, mode, page_texts = result
+        summary_cache.update(manifest.summary_cache())
+        groups = manifest.previous_groups()
+
+        if index is not None:
+            if not index.has_document(doc_hash):
+                index.add_document(doc_hash, _document_key(file_path), page_texts)
+        if mode == "native":
+            doc_text = format_pdf_pages(enumerate(page_texts))
+        else:
+            doc_text = "\n\n".join(page_texts)
+        if doc_text.strip():
+            all_text.append(doc_text)
+
+        chunks = chunk_pages(page_texts, max_chars=3000, groups=groups)
+        all_chunks.extend(text for _pages, text in chunks)
+        manifests.append(manifest)
+        doc_chunks.append(chunks)
+
+    extracted_text = "\n\n".join(all_text)
+    print(f"Extracted text length: {len(extracted_text)} chars")
+    if not extracted_text.strip():
+        return "", ""
+
+    cached = sum(1 for c in all_chunks if summarizer.cache_key(c) in summary_cache)
+    print(f"Re-summarizing {len(all_chunks) - cached} of {len(all_chunks)} chunk(s)")
+    summary = summarizer.summarize_chunks(all_chunks, chunk_cache=summary_cache)
+
+    for manifest, chunks in zip(manifests, doc_chunks):
+        keys = [summarizer.cache_key(text) for _pages, text in chunks]
+        manifest.update_chunks(chunks, keys, summary_cache)
+        if manifest_dir:
+            manifest.save()
+
+    return extracted_text, summary
+
+
 def scan_and_summarize(
-    input_paths: List[str],
+    input_paths: List[Union[str, BinaryIO]],
     use_preprocess: bool = True,
     model_name: Optional[str] = None,
     save_text: Optional[str] = None,
-    save_summary: Optional[str] = None
+    save_summary: Optional[str] = None,
+    priority: str = PRIORITY_BATCH,
+    token_budget: Optional[int] = None,
+    backend: str = "gemini",
+    prefilter_ratio: Optional[float] = None,
+    manifest_dir: Optional[str] = None,
+    index_path: Optional[str] = None
 ) -> Tuple[str, str]:
     """
     Complete document scanner pipeline:
-    1. Collect all files from input paths
+    1. Collect all files from input paths (binary streams and archives are read in memory)
     2. Extract text (using best method for each file type)
     3. Summarize with LLM
     4. Optionally save outputs
     
+    priority: LLM scheduler class ('interactive' for the UI, 'batch' otherwise)
+    token_budget: optional token cap for this job's LLM calls
+    backend: 'gemini' or 'extractive' (local, offline); for 'extractive',
+             model_name selects the scoring method ('textrank' or 'tfidf')
+    prefilter_ratio: keep only this fraction of salient sentences before the LLM call
+    manifest_dir: enable incremental re-processing; per-document page manifests
+                  are kept here and unchanged pages/chunks are reused
+    index_path: SQLite file; per-page text is added to a full-text index
+                that query_and_summarize can search later
+    
     Returns: (extracted_text, summary)
     """
     print("Starting document scanner pipeline")
     
-    # Expand paths to files
-    files = get_file_paths(input_paths)
-    print(f"Found {len(files)} file(s) to process")
+    # Expand paths to files; file-like inputs (e.g. uploads) are used as streams
+    streams = [i for i in input_paths if hasattr(i, "read")]
+    files = get_file_paths([i for i in input_paths if not hasattr(i, "read")])
+    print(f"Found {len(files)} file(s) and {len(streams)} stream(s) to process")
     
-    if not files:
+    if not files and not streams:
         print("No files found to process")
         return "", ""
     
-    # Extract text from file via OCR Model
-    extracted_text = extract_text_from_files(files, use_preprocess=use_preprocess)
-    print(f"Extracted text length: {len(extracted_text)} chars")
-    
-    if not extracted_text.strip():
-        print("No text extracted from files")
-        return "", ""
+    summarizer = get_backend(
+        backend,
+        model=model_name,
+        priority=priority,
+        token_budget=token_budget,
+        prefilter_ratio=prefilter_ratio
+    )
     
-    # Summarize
-    print("Generating summary with LLM")
-    summary = summarize_with_gemini(extracted_text, model=model_name)
+    if manifest_dir or index_path:
+        index = TextIndex(index_path) if index_path else None
+        try:
+            extracted_text, summary = scan_and_summarize_pages(
+                files, summarizer,
+                use_preprocess=use_preprocess,
+                manifest_dir=manifest_dir,
+                index=index,
+                streams=streams
+            )
+        finally:
+            if index is not None:
+                index.close()
+        if not extracted_text.strip():
+            print("No text extracted from files")
+            return "", ""
+    else:
+        # Extract text from file via OCR Model
+        extracted_text = extract_text_from_files(files, use_preprocess=use_preprocess, streams=streams)
+        print(f"Extracted text length: {len(extracted_text)} chars")
+        
+        if not extracted_text.strip():
+            print("No text extracted from files")
+            return "", ""
+        
+        # Summarize
+        print(f"Generating summary with '{backend}' backend")
+        summary = summarizer.summarize(extracted_text)
     print(f"Summary generated length: {len(summary)} chars")
     
     # Save outputs if requested
@@ -123,3 +446,52 @@ def scan_and_summarize(
     
     return extracted_text, summary
 
+
+def query_and_summarize(
+    query: str,
+    index_path: str,
+    top_k: int = 8,
+    model_name: Optional[str] = None,
+    backend: str = "gemini",
+    priority: str = PRIORITY_BATCH,
+    token_budget: Optional[int] = None,
+    save_summary: Optional[str] = None
+) -> Tuple[str, str]:
+    """
+    Query mode: search the full-text index built by scan_and_summarize(index_path=...)
+    and summarize only the top-ranked pages, focused on the question.
+    No files are re-extracted.
+    
+    Returns: (retrieved_text, summary)
+    """
+    index = TextIndex(index_path)
+    try:
+        hits = index.search(query, limit=top_k)
+    finally:
+        index.close()
+    print(f"Found {len(hits)} matching page(s) for query: {query}")
+    
+    if not hits:
+        return "", ""
+    
+    page_texts = [hit["text"] for hit in hits]
+    retrieved_text = "\n\n".join(
+        f"--- {Path(hit['path']).name}, page {hit['page'] + 1} ---\n{hit['text']}" for hit in hits
+    )
+    
+    summarizer = get_backend(
+        backend,
+        model=model_name,
+        priority=priority,
+        token_budget=token_budget,
+        focus=query
+    )
+    chunks = [text for _pages, text in chunk_pages(page_texts, max_chars=3000)]
+    summary = summarizer.summarize_chunks(chunks)
+    print(f"Summary generated length: {len(summary)} chars")
+    
+    if save_summary:
+        Path(save_summary).write_text(summary, encoding='utf-8')
+        print(f"Saved summary -> {save_summary}")
+    
+    return retrieved_text, summary
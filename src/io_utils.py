@@ -19,53 +19,415 @@
 #             imgs.append(Image.open(p).convert('RGB'))
 #     return imgs
 
+import io
 import os
 import logging
-from typing import List
-from pdf2image import convert_from_path
-from PIL import Image
+import struct
+import tarfile
+import threading
+import zipfile
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+from pdf2image import convert_from_bytes, convert_from_path
+from PIL import Image, ImageSequence
+from PIL.TiffImagePlugin import ImageFileDirectory_v2
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 SUPPORTED_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tiff", ".webp")
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
 
+# Large-format scans (posters, engineering drawings) exceed PIL's default
+# decompression-bomb limit (~179 MP). Only the tiled path, which never converts
+# a whole frame, allows up to ~600 MP; everything else keeps PIL's guard.
+MAX_IMAGE_PIXELS = 600_000_000
+_pixel_limit_lock = threading.Lock()
 
-def images_from_paths(paths: List[str], dpi: int = 300) -> List[Image.Image]:
+
+def _open_image(source: Union[str, BinaryIO], large: bool = False) -> Image.Image:
     """
-    Accepts file or folder paths.
-    - If folder: auto-loads all images inside it.
-    - If PDF: convert pages to images (for OCR fallback).
-    - Else: open image file.
-    Returns list of PIL images.
+    Image.open, allowing up to MAX_IMAGE_PIXELS when `large`. PIL's limit is a
+    module global checked on open, so it is raised only around the open call,
+    under a lock.
+    """
+    if not large:
+        return Image.open(source)
+    with _pixel_limit_lock:
+        default = Image.MAX_IMAGE_PIXELS
+        Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+        try:
+            return Image.open(source)
+        finally:
+            Image.MAX_IMAGE_PIXELS = default
+
+
+def _fit_to_budget(frame: Image.Image, max_side: int, mode: str) -> Image.Image:
+    """
+    Decode a frame at (close to) the pixel budget instead of full size.
+    JPEG: draft() makes libjpeg decode at 1/2, 1/4 or 1/8 scale (DCT scaling),
+    and straight to grayscale when mode is 'L'. Other formats cannot decode
+    reduced, so they are box-reduced right after decoding, before the RGB/NumPy
+    copies downstream. The result never drops below max_side, so the final
+    resize in preprocess_for_ocr is unchanged.
+    """
+    w, h = frame.size
+    factor = max(w, h) // max_side
+    if factor < 2:
+        return frame
+    if frame.format == "JPEG":
+        frame.draft(mode, (w // factor, h // factor))
+        return frame.convert(mode)
+    return frame.convert(mode).reduce(factor)
+
+
+# Bits per pixel of raw (uncompressed) pixel layouts that can be decoded strip by strip
+_RAW_BITS = {
+    "1": 1, "L": 8, "P": 8, "I;16": 16, "I;16B": 16,
+    "RGB": 24, "BGR": 24, "RGBA": 32, "RGBX": 32, "BGRA": 32, "BGRX": 32, "CMYK": 32,
+}
+
+
+def _band_tiles(img: Image.Image, top: int, bottom: int) -> Optional[List[Tuple]]:
+    """
+    img.tile restricted to rows [top, bottom) and shifted to start at row 0,
+    or None when the frame is not stored as raw strips/tiles (compressed data
+    has to be decoded from the start).
+    """
+    if img.getexif().get(0x0112, 1) != 1:
+        # EXIF-rotated: rows on disk are not rows of the displayed image
+        return None
+    tiles = []
+    for codec, (x0, y0, x1, y1), offset, args in img.tile:
+        if codec != "raw":
+            return None
+        rawmode, stride, orientation = (args, 0, 1) if isinstance(args, str) else (tuple(args) + (0, 1))[:3]
+        bits = _RAW_BITS.get(rawmode)
+        if bits is None:
+            return None
+        if y1 <= top or y0 >= bottom:
+            continue
+        stride = stride or ((x1 - x0) * bits + 7) // 8
+        r0, r1 = max(y0, top) - y0, min(y1, bottom) - y0
+        # Bottom-up layouts (BMP) store the last row first
+        skip = r0 if orientation > 0 else (y1 - y0) - r1
+        tiles.append((codec, (x0, y0 + r0 - top, x1, y0 + r1 - top),
+                      offset + skip * abs(stride), (rawmode, stride, orientation)))
+    return tiles or None
+
+
+# TIFF tags that point into the original file: SubIFDs, Exif IFD, GPS IFD
+_TIFF_POINTER_TAGS = (330, 34665, 34853)
+
+
+def _tiff_strip_band(img: Image.Image, top: int, bottom: int) -> Optional[Tuple[Image.Image, int]]:
+    """
+    Decode only the compressed TIFF strips covering rows [top, bottom): they
+    are copied into a small in-memory TIFF with the frame's tags, which libtiff
+    decodes on its own. Returns (band, frame row the band starts at), or None
+    for anything but an upright, interleaved TIFF stored in several strips
+    (tiled TIFFs and old-style JPEG are not handled).
+    """
+    if img.format != "TIFF":
+        return None
+    tags = img.tag_v2
+    height = img.size[1]
+    rows = tags.get(278, height)  # RowsPerStrip
+    if (322 in tags or 273 not in tags or 279 not in tags or rows >= height
+            or tags.get(259, 1) == 6 or tags.get(274, 1) != 1 or tags.get(284, 1) != 1):
+        return None
+
+    first, last = top // rows, (bottom - 1) // rows
+    strips = []
+    for i in range(first, last + 1):
+        img.fp.seek(tags[273][i])
+        strips.append(img.fp.read(tags[279][i]))
+    span_top = first * rows
+    span_bottom = min((last + 1) * rows, height)
+
+    ifd = ImageFileDirectory_v2(prefix=tags.prefix)
+    for tag, value in tags.items():
+        if tag in (257, 273, 279) + _TIFF_POINTER_TAGS:
+            continue
+        ifd[tag] = value
+        ifd.tagtype[tag] = tags.tagtype[tag]
+    ifd[257] = span_bottom - span_top
+    # PIL writes strip offsets relative to the end of the IFD, where the data goes
+    offsets, pos = [], 0
+    for data in strips:
+        offsets.append(pos)
+        pos += len(data)
+    ifd[273] = tuple(offsets)
+    ifd[279] = tuple(len(data) for data in strips)
+    ifd.tagtype[273] = ifd.tagtype[279] = 4  # LONG
+
+    header = tags.prefix + (b"*\x00" if tags.prefix == b"II" else b"\x00*")
+    header += struct.pack("<L" if tags.prefix == b"II" else ">L", 8)
+    band = Image.open(io.BytesIO(header + ifd.tobytes(8) + b"".join(strips)))
+    band.load()
+    return band, span_top
+
+
+class OversizedFrame:
+    """
+    A frame too large to decode in one piece, handed to tiled OCR instead of
+    a PIL image. region() decodes only the requested rows for uncompressed
+    strips/tiles (raw TIFF, BMP) and for compressed TIFF strips. Other formats
+    (PNG, JPEG, tiled or single-strip TIFF) cannot be decoded partially: they
+    are decoded once in their native mode and held until close(). Tiles are
+    converted to `mode` after cropping.
+    """
+
+    def __init__(self, source: Union[str, BinaryIO], index: int, frame: Image.Image, mode: str):
+        self.source = source
+        self.index = index
+        self.size = frame.size
+        self.mode = mode
+        dpi = frame.info.get("dpi")
+        self.info = {"dpi": dpi} if dpi else {}
+        self._full: Optional[Image.Image] = None
+
+    def _open(self) -> Image.Image:
+        img = _open_image(self.source, large=True)
+        img.seek(self.index)
+        return img
+
+    def region(self, top: int, bottom: int) -> Tuple[Image.Image, int]:
+        """
+        Pixels covering rows [top, bottom) in the frame's native mode, and
+        the frame row the returned image starts at.
+        """
+        if self._full is not None:
+            return self._full, 0
+        pos = self.source.tell() if hasattr(self.source, "tell") else None
+        try:
+            img = self._open()
+            tiles = _band_tiles(img, top, bottom)
+            if tiles is not None:
+                img.tile = tiles
+                img._size = (self.size[0], bottom - top)
+                img.load()
+                return img, top
+            try:
+                band = _tiff_strip_band(img, top, bottom)
+            except Exception as e:
+                logger.warning(f"Strip decoding failed, decoding the whole frame: {e}")
+                band = None
+            if band is not None:
+                img.close()
+                return band
+            img.load()
+            self._full = img
+            return img, 0
+        finally:
+            if pos is not None:
+                # Shared with the caller's open image
+                self.source.seek(pos)
+
+    def close(self):
+        """
+        Drop the fully decoded frame, if one was kept.
+        """
+        self._full = None
+
+
+def iter_image_frames(path: Union[str, BinaryIO],
+                      max_side: Optional[int] = None,
+                      grayscale: bool = False,
+                      full_res_above: Optional[int] = None) -> Iterator[Image.Image]:
+    """
+    Yield every frame of an image file (path or binary file object), one at a time.
+    Multi-page TIFFs (faxes) yield all pages, not just the first.
+    max_side: downstream pixel budget (longest side); larger frames are
+              decoded at reduced scale where the format allows it.
+    grayscale: decode to 'L' instead of RGB (when color is not needed).
+    full_res_above: frames whose longest side exceeds this keep full resolution
+                    and are yielded as OversizedFrame (OCRed in tiles, decoded
+                    band by band where the format allows it).
     """
-    imgs = []
+    mode = "L" if grayscale else "RGB"
+    try:
+        with _open_image(path, large=full_res_above is not None) as img:
+            n_frames = getattr(img, "n_frames", 1)
+            for i, frame in enumerate(ImageSequence.Iterator(img)):
+                try:
+                    oversized = full_res_above is not None and max(frame.size) > full_res_above
+                    if oversized:
+                        yield OversizedFrame(path, i, frame, mode)
+                        continue
+                    if max_side:
+                        frame = _fit_to_budget(frame, max_side, mode)
+                    yield frame.convert(mode)
+                except Exception as e:
+                    logger.warning(f"Failed to decode frame {i + 1}/{n_frames} of {path}: {e}")
+    except Exception as e:
+        logger.warning(f"Failed to open image {path}: {e}")
+
 
+def iter_images_from_paths(paths: List[str], dpi: int = 300,
+                           max_side: Optional[int] = None,
+                           grayscale: bool = False,
+                           full_res_above: Optional[int] = None) -> Iterator[Image.Image]:
+    """
+    Streaming version of images_from_paths: yields images one by one so
+    only the frame/page being processed is held in memory.
+    max_side / grayscale / full_res_above: see iter_image_frames
+    (PDF pages honour grayscale only).
+    """
     for p in paths:
         p = os.path.abspath(p)
 
-        if os.path.isdir(p):
+        if is_archive(p):
+            # ZIP/tar bundle - decode members straight from memory
+            for name, data in iter_archive_members(p, SUPPORTED_IMAGE_EXTENSIONS + (".pdf",)):
+                yield from iter_images_from_bytes(name, data, dpi, max_side, grayscale, full_res_above)
+        elif os.path.isdir(p):
             # Folder input - load all images
             for file in sorted(os.listdir(p)):
                 full_path = os.path.join(p, file)
                 if file.lower().endswith(SUPPORTED_IMAGE_EXTENSIONS):
-                    try:
-                        imgs.append(Image.open(full_path).convert("RGB"))
-                    except Exception as e:
-                        logger.warning(f"Failed to open image {full_path}: {e}")
+                    yield from iter_image_frames(full_path, max_side, grayscale, full_res_above)
         else:
             # PDF support - convert to images
             if p.lower().endswith(".pdf"):
                 try:
-                    pages = convert_from_path(p, dpi=dpi)
-                    imgs.extend(pages)
+                    pages = convert_from_path(p, dpi=dpi, grayscale=grayscale)
                 except Exception as e:
                     logger.error(f"Failed to convert PDF {p} to images: {e}")
+                    pages = []
+                yield from pages
             else:
-                # Regular image file
-                try:
-                    imgs.append(Image.open(p).convert("RGB"))
-                except Exception as e:
-                    logger.warning(f"Failed to open image {p}: {e}")
+                # Regular image file (all frames)
+                yield from iter_image_frames(p, max_side, grayscale, full_res_above)
+
 
-    return imgs
+def images_from_paths(paths: List[str], dpi: int = 300) -> List[Image.Image]:
+    """
+    Accepts file or folder paths.
+    - If folder: auto-loads all images inside it.
+    - If ZIP/tar archive: loads the images/PDFs inside it without unpacking to disk.
+    - If PDF: convert pages to images (for OCR fallback).
+    - Else: open image file (every frame of multi-page TIFFs).
+    Returns list of PIL images.
+    """
+    return list(iter_images_from_paths(paths, dpi=dpi))
+
+
+def images_from_pdf_pages(pdf_path: Union[str, bytes], page_numbers: List[int], dpi: int = 300,
+                          grayscale: bool = False) -> Dict[int, Image.Image]:
+    """
+    Render only the selected PDF pages (0-based) to images for OCR.
+    pdf_path may also be the PDF's bytes.
+    """
+    in_memory = isinstance(pdf_path, (bytes, bytearray))
+    convert = convert_from_bytes if in_memory else convert_from_path
+    pages = {}
+    for n in page_numbers:
+        try:
+            rendered = convert(pdf_path, dpi=dpi, first_page=n + 1, last_page=n + 1,
+                               grayscale=grayscale)
+            if rendered:
+                pages[n] = rendered[0]
+        except Exception as e:
+            source = "in-memory PDF" if in_memory else pdf_path
+            logger.error(f"Failed to convert page {n + 1} of {source} to image: {e}")
+    return pages
+
+
+def iter_images_from_bytes(name: str, data: bytes, dpi: int = 300,
+                           max_side: Optional[int] = None,
+                           grayscale: bool = False,
+                           full_res_above: Optional[int] = None) -> Iterator[Image.Image]:
+    """
+    iter_images_from_paths for a single in-memory file; `name` only selects
+    PDF vs image handling.
+    """
+    if name.lower().endswith(".pdf"):
+        try:
+            pages = convert_from_bytes(data, dpi=dpi, grayscale=grayscale)
+        except Exception as e:
+            logger.error(f"Failed to convert PDF {name} to images: {e}")
+            pages = []
+        yield from pages
+    else:
+        yield from iter_image_frames(io.BytesIO(data), max_side, grayscale, full_res_above)
+
+
+def is_archive(name: str) -> bool:
+    return name.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def sniff_stream(stream: BinaryIO) -> Tuple[Optional[str], BinaryIO]:
+    """
+    Kind of a binary stream judged from its content, not its name:
+    'pdf', 'zip', 'tar' (plain or compressed), 'image', or None if unsupported.
+    Non-seekable streams are buffered in memory first. Returns the kind and
+    the stream to read from, positioned where it started.
+    """
+    if not (hasattr(stream, "seekable") and stream.seekable()):
+        stream = io.BytesIO(stream.read())
+    start = stream.tell()
+
+    def rewind():
+        stream.seek(start)
+
+    # Archives first: a stored PDF member puts '%PDF-' near the start of a ZIP/tar
+    if zipfile.is_zipfile(stream):
+        rewind()
+        return "zip", stream
+    rewind()
+    try:
+        with tarfile.open(fileobj=stream, mode="r:*"):
+            pass
+        rewind()
+        return "tar", stream
+    except (tarfile.TarError, OSError, EOFError):
+        rewind()
+    # PDF readers accept the header anywhere in the first 1 KB
+    if b"%PDF-" in stream.read(1024):
+        rewind()
+        return "pdf", stream
+    rewind()
+    try:
+        with _open_image(stream, large=True):
+            pass
+        rewind()
+        return "image", stream
+    except Exception:
+        rewind()
+    return None, stream
+
+
+def iter_archive_members(archive: Union[str, BinaryIO],
+                         extensions: Tuple[str, ...]) -> Iterator[Tuple[str, bytes]]:
+    """
+    Lazily yield (member name, bytes) for supported files inside a ZIP or tar
+    archive (path or binary file object), without extracting to disk.
+    Only one member is read into memory per step; tar archives are read in
+    streaming mode, so compressed tarballs and non-seekable streams work too.
+    """
+    name = archive if isinstance(archive, str) else getattr(archive, "name", "")
+    # A stream may start past offset 0 (e.g. after sniff_stream); tar reads from here
+    start = None if isinstance(archive, str) else archive.tell()
+    try:
+        if str(name).lower().endswith(".zip") or zipfile.is_zipfile(archive):
+            with zipfile.ZipFile(archive) as zf:
+                for info in zf.infolist():
+                    if info.is_dir() or not info.filename.lower().endswith(extensions):
+                        continue
+                    yield info.filename, zf.read(info)
+            return
+
+        if isinstance(archive, str):
+            tar = tarfile.open(name=archive, mode="r|*")
+        else:
+            archive.seek(start)
+            tar = tarfile.open(fileobj=archive, mode="r|*")
+        with tar:
+            for member in tar:
+                if not member.isfile() or not member.name.lower().endswith(extensions):
+                    continue
+                fh = tar.extractfile(member)
+                if fh is not None:
+                    yield member.name, fh.read()
+    except (zipfile.BadZipFile, tarfile.TarError, OSError) as e:
+        logger.error(f"Failed to read archive {name}: {e}")
@@ -0,0 +1,266 @@
+import os
+import json
+import time
+import tempfile
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Priority classes: interactive callers (the Streamlit app) always go ahead of batch jobs
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BATCH = "batch"
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BATCH)
+
+# Defaults; GEMINI_REQUESTS_PER_MINUTE, GEMINI_TOKENS_PER_MINUTE and
+# GEMINI_SCHEDULER_STATE (e.g. from the .env file) override them
+DEFAULT_REQUESTS_PER_MINUTE = 15
+DEFAULT_TOKENS_PER_MINUTE = 250000
+DEFAULT_STATE_FILE = os.path.join(tempfile.gettempdir(), "docscan_llm_scheduler.json")
+
+# Backoff applied to every process sharing the state file after a 429
+RATE_LIMIT_BACKOFF_SECONDS = 30.0
+MAX_POLL_SECONDS = 1.0
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token estimate (~4 characters per token) used for budgeting.
+    """
+    return max(1, len(text) // 4)
+
+
+class JobBudget:
+    """
+    Per-job token budget. The summarizer asks it how much is left and
+    switches to shallower prompts instead of failing when it runs low.
+    """
+
+    def __init__(self, max_tokens: int):
+        self.max_tokens = max_tokens
+        self.used = 0
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.max_tokens - self.used)
+
+    def can_afford(self, tokens: int) -> bool:
+        return tokens <= self.remaining
+
+    def charge(self, tokens: int):
+        self.used += tokens
+
+
+@contextmanager
+def _file_lock(lock_path: str):
+    """
+    Exclusive inter-process lock on a side-car lock file.
+    """
+    fh = open(lock_path, "a+")
+    try:
+        if os.name == "nt":
+            import msvcrt
+            fh.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+        else:
+            import fcntl
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        yield
+    finally:
+        try:
+            if os.name == "nt":
+                import msvcrt
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+        finally:
+            fh.close()
+
+
+class LLMScheduler:
+    """
+    Token-bucket scheduler shared by every summarization call.
+
+    Request and token buckets live in a small JSON state file guarded by a
+    file lock, so concurrent pipelines (threads or separate processes) draw
+    from the same per-minute quota instead of each hitting the API on its own.
+    """
+
+    def __init__(self,
+                 requests_per_minute: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None,
+                 state_file: Optional[str] = None):
+        # Environment is read here rather than at import, so load_dotenv() calls
+        # made after importing this module still take effect
+        self.requests_per_minute = requests_per_minute or int(
+            os.getenv("GEMINI_REQUESTS_PER_MINUTE", DEFAULT_REQUESTS_PER_MINUTE))
+        self.tokens_per_minute = tokens_per_minute or int(
+            os.getenv("GEMINI_TOKENS_PER_MINUTE", DEFAULT_TOKENS_PER_MINUTE))
+        self.state_file = state_file or os.getenv("GEMINI_SCHEDULER_STATE", DEFAULT_STATE_FILE)
+        self.lock_file = self.state_file + ".lock"
+        self._local_lock = threading.Lock()
+        self._stats = {p: {"calls": 0, "total_wait": 0.0, "max_wait": 0.0} for p in PRIORITIES}
+
+    def _load_state(self, now: float) -> Dict:
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        state.setdefault("requests", {"level": float(self.requests_per_minute), "updated": now})
+        state.setdefault("tokens", {"level": float(self.tokens_per_minute), "updated": now})
+        state.setdefault("waiting", {p: {} for p in PRIORITIES})
+        state.setdefault("blocked_until", 0.0)
+        return state
+
+    def _save_state(self, state: Dict):
+        tmp_path = self.state_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_file)
+
+    @staticmethod
+    def _refill(bucket: Dict, capacity: int, now: float):
+        elapsed = max(0.0, now - bucket["updated"])
+        bucket["level"] = min(float(capacity), bucket["level"] + elapsed * capacity / 60.0)
+        bucket["updated"] = now
+
+    def _waiter_key(self) -> str:
+        return f"{os.getpid()}:{threading.get_ident()}"
+
+    @staticmethod
+    def _prune_waiters(waiting: Dict, now: float):
+        # Drop registrations from callers that died without cleaning up
+        for prio in PRIORITIES:
+            entries = waiting.get(prio, {})
+            waiting[prio] = {k: v for k, v in entries.items() if now - v < 120.0}
+
+    def acquire(self, tokens: int, priority: str = PRIORITY_BATCH) -> float:
+        """
+        Block until one request and `tokens` tokens are available.
+        Batch callers yield while any interactive caller is queued.
+        Returns the time spent waiting in the queue (seconds).
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}', expected one of {PRIORITIES}")
+
+        # A single call larger than the whole bucket could never be admitted
+        tokens = min(tokens, self.tokens_per_minute)
+        key = self._waiter_key()
+        start = time.time()
+
+        while True:
+            with self._local_lock, _file_lock(self.lock_file):
+                now = time.time()
+                state = self._load_state(now)
+                self._refill(state["requests"], self.requests_per_minute, now)
+                self._refill(state["tokens"], self.tokens_per_minute, now)
+                self._prune_waiters(state["waiting"], now)
+
+                interactive_queued = any(
+                    k != key for k in state["waiting"][PRIORITY_INTERACTIVE]
+                )
+                yield_to_interactive = priority == PRIORITY_BATCH and interactive_queued
+
+                if (now >= state["blocked_until"]
+                        and not yield_to_interactive
+                        and state["requests"]["level"] >= 1.0
+                        and state["tokens"]["level"] >= tokens):
+                    state["requests"]["level"] -= 1.0
+                    state["tokens"]["level"] -= tokens
+                    state["waiting"][priority].pop(key, None)
+                    self._save_state(state)
+                    break
+
+                state["waiting"][priority][key] = now
+                self._save_state(state)
+
+                # Sleep until the scarcer bucket should have refilled enough
+                req_deficit = max(0.0, 1.0 - state["requests"]["level"])
+                tok_deficit = max(0.0, tokens - state["tokens"]["level"])
+                sleep_for = max(
+                    req_deficit * 60.0 / self.requests_per_minute,
+                    tok_deficit * 60.0 / self.tokens_per_minute,
+                    state["blocked_until"] - now,
+                    0.05,
+                )
+            time.sleep(min(sleep_for, MAX_POLL_SECONDS))
+
+        waited = time.time() - start
+        self._record_wait(priority, waited)
+        return waited
+
+    def report_rate_limited(self, backoff: float = RATE_LIMIT_BACKOFF_SECONDS):
+        """
+        Called after the API answers 429: pause every process sharing the
+        state file and drain the request bucket, so retries don't pile up.
+        """
+        with self._local_lock, _file_lock(self.lock_file):
+            now = time.time()
+            state = self._load_state(now)
+            state["blocked_until"] = max(state["blocked_until"], now + backoff)
+            state["requests"]["level"] = 0.0
+            state["requests"]["updated"] = now
+            self._save_state(state)
+        logger.warning(f"LLM rate limit hit, pausing all jobs for {backoff:.0f}s")
+
+    def _record_wait(self, priority: str, waited: float):
+        stats = self._stats[priority]
+        stats["calls"] += 1
+        stats["total_wait"] += waited
+        stats["max_wait"] = max(stats["max_wait"], waited)
+
+    def queue_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Queue wait statistics per priority class for this process,
+        plus the number of callers currently queued across all processes.
+        """
+        with self._local_lock, _file_lock(self.lock_file):
+            state = self._load_state(time.time())
+        out = {}
+        for prio, stats in self._stats.items():
+            calls = stats["calls"]
+            out[prio] = {
+                "calls": calls,
+                "avg_wait": stats["total_wait"] / calls if calls else 0.0,
+                "max_wait": stats["max_wait"],
+                "queued": len(state["waiting"].get(prio, {})),
+            }
+        return out
+
+
+def format_queue_stats(stats: Dict[str, Dict[str, float]]) -> str:
+    """
+    One line per priority class that made LLM calls, for CLI/app output.
+    """
+    lines = [
+        f"{prio}: {s['calls']} call(s), avg wait {s['avg_wait']:.1f}s, "
+        f"max wait {s['max_wait']:.1f}s, {s['queued']} queued"
+        for prio, s in stats.items() if s["calls"] or s["queued"]
+    ]
+    return "\n".join(lines) or "No LLM calls queued"
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """
+    Process-wide scheduler instance (configured from the environment).
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler()
+        return _scheduler
@@ -0,0 +1,152 @@
+import os
+import json
+import hashlib
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+MANIFEST_VERSION = 1
+
+
+def file_hash(path: str) -> str:
+    """
+    SHA-256 of a file's bytes, read in blocks.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def bytes_hash(data: bytes) -> str:
+    """
+    SHA-256 of in-memory bytes (same digest file_hash gives for a file with them).
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+class PageManifest:
+    """
+    Per-document record of the last run, stored as JSON in the manifest dir:
+     - pages: content hash and extracted text of every page
+     - chunks: the pages each summary chunk was built from, its cache key and summary
+     - mode/settings: how the text was extracted (a change invalidates all pages)
+    A re-run compares fresh page hashes against it and only re-extracts and
+    re-summarizes what changed.
+    """
+
+    def __init__(self, manifest_path: Optional[str], doc_path: str, data: Optional[Dict] = None):
+        self.manifest_path = manifest_path
+        self.doc_path = doc_path
+        self.data = data or {
+            "version": MANIFEST_VERSION,
+            "path": doc_path,
+            "mode": None,
+            "settings": {},
+            "pages": [],
+            "chunks": [],
+        }
+        # Pages of the previous run, kept by update_pages for previous_groups
+        self._previous_pages: Optional[List[Dict]] = None
+
+    @classmethod
+    def load(cls, manifest_dir: str, doc_path: str) -> "PageManifest":
+        """
+        doc_path: absolute path of the document, or another stable key for
+        documents that do not live on disk.
+        """
+        name = hashlib.sha1(doc_path.encode("utf-8")).hexdigest() + ".json"
+        manifest_path = os.path.join(manifest_dir, name)
+        data = None
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                data = None
+        except (OSError, ValueError):
+            data = None
+        return cls(manifest_path, doc_path, data)
+
+    def save(self):
+        Path(self.manifest_path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def reusable_texts(self, mode: str, settings: Dict) -> Dict[str, str]:
+        """
+        Previously extracted text keyed by page hash, provided the document
+        was extracted the same way last time. Matching on hash (not position)
+        also keeps the text of pages that moved because of inserts/deletes.
+        """
+        if self.data["mode"] != mode or self.data["settings"] != settings:
+            return {}
+        return {p["hash"]: p["text"] for p in self.data["pages"]}
+
+    def previous_groups(self) -> List[List[int]]:
+        """
+        Page grouping of the previous chunks (oversized pages appear once),
+        mapped onto the current pages by page hash. Unchanged pages keep their
+        group; new or edited pages join the group of the page before them
+        (or after, at the start), so an insert only disturbs one group.
+        Groups are consecutive runs of current page indices.
+        """
+        old_groups = []
+        for chunk in self.data["chunks"]:
+            if not old_groups or old_groups[-1] != chunk["pages"]:
+                old_groups.append(chunk["pages"])
+        old_pages = self.data["pages"] if self._previous_pages is None else self._previous_pages
+        new_hashes = [p["hash"] for p in self.data["pages"]]
+        if not old_groups or not new_hashes:
+            return []
+
+        positions = defaultdict(deque)
+        for i, h in enumerate(new_hashes):
+            positions[h].append(i)
+        old_to_new = {}
+        for i, page in enumerate(old_pages):
+            if positions[page["hash"]]:
+                old_to_new[i] = positions[page["hash"]].popleft()
+
+        assigned: List[Optional[int]] = [None] * len(new_hashes)
+        for g, group in enumerate(old_groups):
+            for i in group:
+                if i in old_to_new:
+                    assigned[old_to_new[i]] = g
+        known = [g for g in assigned if g is not None]
+        if not known:
+            return []
+        last = known[0]
+        for i, g in enumerate(assigned):
+            if g is None:
+                assigned[i] = last
+            else:
+                last = g
+
+        groups: List[List[int]] = []
+        for i, g in enumerate(assigned):
+            if i and g == assigned[i - 1]:
+                groups[-1].append(i)
+            else:
+                groups.append([i])
+        return groups
+
+    def summary_cache(self) -> Dict[str, str]:
+        return {c["key"]: c["summary"] for c in self.data["chunks"] if c.get("summary")}
+
+    def update_pages(self, mode: str, settings: Dict, hashes: List[str], texts: List[str]):
+        if self._previous_pages is None:
+            self._previous_pages = self.data["pages"]
+        self.data["mode"] = mode
+        self.data["settings"] = settings
+        self.data["pages"] = [{"hash": h, "text": t, "chunks": []} for h, t in zip(hashes, texts)]
+
+    def update_chunks(self, chunks: List[Tuple[List[int], str]], keys: List[str],
+                      summaries: Dict[str, str]):
+        self.data["chunks"] = []
+        for idx, ((pages, _text), key) in enumerate(zip(chunks, keys)):
+            self.data["chunks"].append({"pages": pages, "key": key, "summary": summaries.get(key)})
+            for p in pages:
+                self.data["pages"][p]["chunks"].append(idx)
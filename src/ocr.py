@@ -1,13 +1,30 @@
 import pytesseract
 from PIL import Image
-from typing import List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import os
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 pytesseract.pytesseract.tesseract_cmd = r"F:\ASKITLOUD\OpenCVProjects\Document_Scanner_Summerisation\model_binaries\tesseract.exe"
 
+# Images whose longer side exceeds this are OCRed as overlapping tiles at full
+# resolution instead of being shrunk to the preprocess size (which loses small print)
+TILE_THRESHOLD = 6000
+TILE_SIZE = 2000      # matches preprocess_for_ocr's resize_max, so tiles are not downscaled
+# Overlap between tiles: at least this fraction of the tile, and at least two of
+# the widest expected words (each side of a seam keeps half the overlap)
+TILE_OVERLAP_RATIO = 0.1
+MAX_WORD_INCHES = 1.0
+# Resolution guess when the file has no usable DPI: the long side spans a letter
+# page, but never more than a high-quality scan (posters are not letter pages)
+ASSUMED_PAGE_INCHES = 11.0
+MAX_ESTIMATED_DPI = 300
+# 72/96 DPI are placeholders written by many encoders, not scan resolutions
+MIN_TRUSTED_DPI = 100
+
 
 def ocr_image_tesseract(pil_img: Image.Image, lang='eng', psm=3, oem=3) -> str:
     """
@@ -23,12 +40,174 @@ def ocr_image_tesseract(pil_img: Image.Image, lang='eng', psm=3, oem=3) -> str:
         text = ""
     return text
 
-def ocr_images(images: List[Image.Image], preprocess_fn=None) -> str:
+def _tile_starts(length: int, tile_size: int, overlap: int) -> List[int]:
+    """
+    Start offsets of overlapping tiles along one axis (last tile flush with the edge).
+    """
+    if length <= tile_size:
+        return [0]
+    starts = list(range(0, length - tile_size, tile_size - overlap))
+    starts.append(length - tile_size)
+    return starts
+
+
+def _core_spans(starts: List[int], length: int, tile_size: int) -> List[Tuple[float, float]]:
+    """
+    Core span of each tile along one axis: shared overlaps are split down the middle,
+    so every point belongs to exactly one tile's core.
+    """
+    cuts = [(nxt + min(cur + tile_size, length)) / 2 for cur, nxt in zip(starts, starts[1:])]
+    bounds = [0.0] + cuts + [float(length)]
+    return list(zip(bounds, bounds[1:]))
+
+
+def tile_geometry(size: Tuple[int, int], dpi: Optional[float] = None,
+                  tile_size: int = TILE_SIZE) -> Tuple[int, int]:
+    """
+    (tile size, overlap) for an image. Tiles stay at tile_size so preprocessing
+    never downscales them; the overlap scales with resolution so words crossing
+    a seam fit in it, up to half a tile.
+    """
+    if not dpi or dpi < MIN_TRUSTED_DPI:
+        dpi = min(max(size) / ASSUMED_PAGE_INCHES, MAX_ESTIMATED_DPI)
+    overlap = max(int(tile_size * TILE_OVERLAP_RATIO), int(2 * MAX_WORD_INCHES * dpi))
+    return tile_size, min(overlap, tile_size // 2)
+
+
+def _crop_tile(source: Image.Image, box: Tuple[int, int, int, int], top: int, mode: str) -> Image.Image:
+    """
+    Crop a tile (box in frame coordinates) from a region starting at row
+    `top`, converting only the tile to the target mode.
+    """
+    tile = source.crop((box[0], box[1] - top, box[2], box[3] - top))
+    return tile if tile.mode == mode else tile.convert(mode)
+
+
+def _ocr_tile_words(tile: Image.Image, box: Tuple[int, int, int, int], preprocess_fn,
+                    lang: str, psm: int, oem: int) -> List[Dict]:
+    """
+    OCR one tile (cropped at `box`) and return its words with boxes in full-image coordinates.
+    """
+    tile_proc = preprocess_fn(tile) if preprocess_fn else tile
+    # Map back in case preprocessing resized the tile
+    sx = tile.width / tile_proc.width
+    sy = tile.height / tile_proc.height
+    try:
+        data = pytesseract.image_to_data(
+            tile_proc, lang=lang, config=f'--oem {oem} --psm {psm}',
+            output_type=pytesseract.Output.DICT
+        )
+    except Exception as e:
+        logger.exception("Tesseract failed on tile %s", box, exc_info=e)
+        return []
+
+    words = []
+    for i, text in enumerate(data["text"]):
+        if not text.strip() or float(data["conf"][i]) < 0:
+            continue
+        words.append({
+            "text": text,
+            "left": box[0] + data["left"][i] * sx,
+            "top": box[1] + data["top"][i] * sy,
+            "width": data["width"][i] * sx,
+            "height": data["height"][i] * sy,
+        })
+    return words
+
+
+def _merge_tile_words(tiles: List[Tuple[Tuple[float, float, float, float], List[Dict]]]) -> str:
+    """
+    Merge words from overlapping tiles back into reading-order text.
+    Each word is kept only by the tile whose core region contains its center,
+    so text in the overlap is not duplicated. Words are then grouped into
+    lines by vertical position.
+    """
+    kept = []
+    for (core_left, core_top, core_right, core_bottom), words in tiles:
+        for w in words:
+            cx = w["left"] + w["width"] / 2
+            cy = w["top"] + w["height"] / 2
+            if core_left <= cx < core_right and core_top <= cy < core_bottom:
+                kept.append(w)
+
+    kept.sort(key=lambda w: (w["top"] + w["height"] / 2, w["left"]))
+    lines: List[List[Dict]] = []
+    for w in kept:
+        cy = w["top"] + w["height"] / 2
+        if lines:
+            last = lines[-1]
+            line_cy = sum(x["top"] + x["height"] / 2 for x in last) / len(last)
+            line_h = max(x["height"] for x in last)
+            if abs(cy - line_cy) < 0.5 * max(line_h, w["height"]):
+                last.append(w)
+                continue
+        lines.append([w])
+
+    out = []
+    for line in lines:
+        line.sort(key=lambda w: w["left"])
+        out.append(" ".join(w["text"] for w in line))
+    return "\n".join(out)
+
+
+def ocr_image_tiled(pil_img, preprocess_fn=None,
+                    tile_size: Optional[int] = None, overlap: Optional[int] = None,
+                    max_workers: Optional[int] = None,
+                    lang='eng', psm=3, oem=3) -> str:
+    """
+    OCR a very large image (PIL image or io_utils.OversizedFrame) as
+    overlapping tiles at full resolution. Tile rows are processed one at a
+    time (an OversizedFrame decodes just that band where it can); the tiles
+    of a row are cropped, converted, preprocessed and OCRed in a thread pool
+    (tesseract runs out of process). Overlap regions are de-duplicated when merging.
+    tile_size / overlap: default from tile_geometry().
+    """
+    width, height = pil_img.size
+    dpi = pil_img.info.get("dpi")
+    tile_size, auto_overlap = tile_geometry(pil_img.size, dpi[0] if dpi else None,
+                                            tile_size or TILE_SIZE)
+    overlap = overlap if overlap is not None else auto_overlap
+    xs = _tile_starts(width, tile_size, overlap)
+    ys = _tile_starts(height, tile_size, overlap)
+    x_cores = _core_spans(xs, width, tile_size)
+    y_cores = _core_spans(ys, height, tile_size)
+    cores = [(xc[0], yc[0], xc[1], yc[1]) for yc in y_cores for xc in x_cores]
+    workers = max_workers or min(len(xs), os.cpu_count() or 1)
+    print(f"  -> Tiled OCR: {width}x{height}px as {len(xs) * len(ys)} tiles "
+          f"({tile_size}px, {overlap}px overlap)")
+
+    results = []
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for y in ys:
+                bottom = min(y + tile_size, height)
+                if hasattr(pil_img, "region"):
+                    source, top = pil_img.region(y, bottom)
+                else:
+                    source, top = pil_img, 0
+                boxes = [(x, y, min(x + tile_size, width), bottom) for x in xs]
+                results.extend(pool.map(
+                    lambda box: _ocr_tile_words(_crop_tile(source, box, top, pil_img.mode), box,
+                                                preprocess_fn, lang, psm, oem),
+                    boxes
+                ))
+                del source
+    finally:
+        if hasattr(pil_img, "region"):
+            pil_img.close()  # drops an OversizedFrame's decoded copy, if it kept one
+    return _merge_tile_words(list(zip(cores, results)))
+
+
+def ocr_images(images: Iterable[Image.Image], preprocess_fn=None) -> str:
     """
-    Takes a list of PIL images, optionally preprocesses them, and returns concatenated text.
+    Takes PIL images (a list or a generator, consumed one at a time), optionally
+    preprocesses them, and returns concatenated text. Oversized images are OCRed in tiles.
     """
     texts = []
     for i, im in enumerate(images):
+        if max(im.size) > TILE_THRESHOLD or hasattr(im, "region"):
+            texts.append(ocr_image_tiled(im, preprocess_fn=preprocess_fn))
+            continue
         if preprocess_fn:
             im_proc = preprocess_fn(im)
         else:
@@ -1,52 +1,307 @@
-from typing import Optional
+import os
+import re
+import time
+import hashlib
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 import fitz  # PyMuPDF
 
+# Below this many pages a process pool costs more than it saves
+PARALLEL_MIN_PAGES = 200
+# Pages sent to a worker per task; small enough that results stream back steadily
+PAGES_PER_TASK = 50
 
-def extract_text_from_pdf(pdf_path: str) -> str:
+# Size of the process pool shared by all extractions in this process
+PDF_WORKERS = os.cpu_count() or 1
+
+# A PDF source is a filesystem path or the PDF's bytes (e.g. an archive member)
+PdfSource = Union[str, bytes]
+
+
+def open_pdf(pdf_path: PdfSource):
+    """
+    Open a PDF from a path or from in-memory bytes.
+    """
+    if isinstance(pdf_path, (bytes, bytearray)):
+        return fitz.open(stream=pdf_path, filetype="pdf")
+    return fitz.open(pdf_path)
+
+
+def _describe(pdf_path: PdfSource) -> str:
+    return f"<{len(pdf_path)} bytes>" if isinstance(pdf_path, (bytes, bytearray)) else pdf_path
+
+
+def format_pdf_pages(pages: Iterable[Tuple[int, str]]) -> str:
+    """
+    Join (page_num, text) pairs in the '--- Page N ---' layout, skipping empty pages.
+    """
+    return "\n\n".join(
+        f"--- Page {page_num + 1} ---\n{text}" for page_num, text in pages if text.strip()
+    )
+
+
+def extract_text_from_pdf(pdf_path: PdfSource, max_workers: Optional[int] = None) -> str:
     """
     Extract text from PDF using PyMuPDF (fitz).
-    Returns concatenated text from all pages.
+    Returns concatenated text from all pages (large PDFs are split across processes).
     """
     try:
-        doc = fitz.open(pdf_path)
-        text_parts = []
-        
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            text = page.get_text()
-            if text.strip():
-                text_parts.append(f"--- Page {page_num + 1} ---\n{text}")
-        
-        doc.close()
-        return "\n\n".join(text_parts)
-    
+        return format_pdf_pages(
+            (page_num, text) for page_num, text, _secs in iter_pdf_pages(pdf_path, max_workers=max_workers)
+        )
+
     except Exception as e:
-        print(f"Failed to extract text from PDF: {pdf_path}", exc_info=e)
+        print(f"Failed to extract text from PDF: {_describe(pdf_path)}: {e}")
         return ""
 
 
-def has_extractable_text(pdf_path: str, min_chars: int = 100) -> bool:
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _shared_pool() -> ProcessPoolExecutor:
+    """
+    The process pool used by every iter_pdf_pages call, created on first use.
+    Documents are extracted from several threads (archive members, watcher
+    jobs), so one pool keeps the total at PDF_WORKERS processes, and its
+    workers are spawned rather than forked from a threaded process.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """
+    Drop a broken shared pool so the next call starts a fresh one.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_page_batch(args: Tuple[PdfSource, List[int]]) -> List[Tuple[int, str, float]]:
+    """
+    Worker: opens its own fitz handle and extracts a batch of pages with timings.
+    """
+    pdf_path, page_numbers = args
+    doc = open_pdf(pdf_path)
+    try:
+        out = []
+        for n in page_numbers:
+            start = time.perf_counter()
+            text = doc[n].get_text()
+            out.append((n, text, time.perf_counter() - start))
+        return out
+    finally:
+        doc.close()
+
+
+def iter_pdf_pages(pdf_path: PdfSource,
+                   page_numbers: Optional[Iterable[int]] = None,
+                   max_workers: Optional[int] = None,
+                   doc=None) -> Iterator[Tuple[int, str, float]]:
+    """
+    Stream (page_num, text, seconds) in page order (0-based page numbers).
+    Large page sets are split into page ranges handled by the shared process
+    pool, where each worker opens its own fitz handle; at most `max_workers`
+    ranges are in flight and results are yielded in order as they arrive.
+    Small ones are extracted in-process, reusing `doc` if given.
+    """
+    own_doc = doc is None
+    if own_doc:
+        doc = open_pdf(pdf_path)
+    try:
+        pages = list(range(len(doc))) if page_numbers is None else sorted(page_numbers)
+        workers = min(max_workers or PDF_WORKERS, PDF_WORKERS)
+        if workers < 2 or len(pages) < PARALLEL_MIN_PAGES:
+            for n in pages:
+                start = time.perf_counter()
+                text = doc[n].get_text()
+                yield n, text, time.perf_counter() - start
+            return
+    finally:
+        if own_doc:
+            doc.close()
+
+    started = time.perf_counter()
+    slowest = (0.0, -1)
+    batch_size = PAGES_PER_TASK
+    if isinstance(pdf_path, (bytes, bytearray)):
+        # In-memory PDFs are shipped to workers with every task: one batch per worker
+        batch_size = max(PAGES_PER_TASK, -(-len(pages) // workers))
+    batches = deque(pages[i:i + batch_size] for i in range(0, len(pages), batch_size))
+    pool = _shared_pool()
+    in_flight = deque()
+    try:
+        while batches or in_flight:
+            while batches and len(in_flight) < workers:
+                in_flight.append(pool.submit(_extract_page_batch, (pdf_path, batches.popleft())))
+            # Futures are consumed in submission order, so pages stream out in order
+            for n, text, secs in in_flight.popleft().result():
+                slowest = max(slowest, (secs, n))
+                yield n, text, secs
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+    finally:
+        for future in in_flight:
+            future.cancel()
+    elapsed = time.perf_counter() - started
+    print(f"  -> Extracted {len(pages)} pages with {workers} workers in {elapsed:.1f}s "
+          f"(slowest: page {slowest[1] + 1}, {slowest[0]:.2f}s)")
+
+
+def _classify(doc, min_chars: int) -> Tuple[bool, Dict[int, str]]:
+    """
+    has_extractable_text rule on an already open document.
+    Also returns the page text it read so callers can reuse it.
+    """
+    checked = {}
+    total_text = ""
+    for page_num in range(min(3, len(doc))):
+        checked[page_num] = doc[page_num].get_text()
+        total_text += checked[page_num]
+        if len(total_text) > min_chars:
+            return True, checked
+    return len(total_text.strip()) > min_chars, checked
+
+
+def extract_pdf_text_pages(pdf_path: PdfSource,
+                           min_chars: int = 100,
+                           page_numbers: Optional[Iterable[int]] = None,
+                           max_workers: Optional[int] = None) -> Tuple[bool, Dict[int, str]]:
+    """
+    Open the PDF once, classify it (same rule as has_extractable_text) and,
+    if it has a text layer, extract the requested pages (default: all).
+    Text read while classifying is reused.
+    Returns (has_text, {page_num: text}); the dict is empty for scanned PDFs.
+    """
+    doc = open_pdf(pdf_path)
+    try:
+        has_text, checked = _classify(doc, min_chars)
+        if not has_text:
+            return False, {}
+        wanted = list(range(len(doc))) if page_numbers is None else sorted(page_numbers)
+        texts = {n: checked[n] for n in wanted if n in checked}
+        remaining = [n for n in wanted if n not in checked]
+        for n, text, _secs in iter_pdf_pages(pdf_path, remaining, max_workers=max_workers, doc=doc):
+            texts[n] = text
+        return True, texts
+    finally:
+        doc.close()
+
+
+def has_extractable_text(pdf_path: PdfSource, min_chars: int = 100) -> bool:
     """
     Check if PDF contains extractable text.
     Returns True if text extraction yields meaningful content.
     """
     try:
-        doc = fitz.open(pdf_path)
-        total_text = ""
-        
-        # Check first few pages
-        pages_to_check = min(3, len(doc))
-        for page_num in range(pages_to_check):
-            page = doc[page_num]
-            total_text += page.get_text()
-            if len(total_text) > min_chars:
-                doc.close()
-                return True
-        
+        doc = open_pdf(pdf_path)
+        has_text, _checked = _classify(doc, min_chars)
         doc.close()
-        return len(total_text.strip()) > min_chars
-    
+        return has_text
+
     except Exception as e:
-        print(f"Failed to check PDF text: {pdf_path}", exc_info=e)
+        print(f"Failed to check PDF text: {_describe(pdf_path)}: {e}")
         return False
 
+
+# Indirect object reference ("12 0 R") and the page-tree back-link inside a dictionary
+_REF_RE = re.compile(r"\b(\d+) (\d+) R\b")
+_PARENT_RE = re.compile(r"/Parent\s+\d+ \d+ R")
+
+
+def _resolve_refs(doc, text: str, memo: Dict[int, str], active: Set[int]) -> str:
+    """
+    Replace every reference in a PDF dictionary/array string with the
+    content hash of the object it points to.
+    """
+    return _REF_RE.sub(lambda m: _object_hash(doc, int(m.group(1)), memo, active), text)
+
+
+def _object_hash(doc, xref: int, memo: Dict[int, str], active: Set[int]) -> str:
+    """
+    Merkle-style hash of a PDF object: its dictionary with references
+    replaced by the referenced objects' hashes, plus its raw stream.
+    Covers everything reachable (nested Form XObjects, images, fonts and
+    font programs) without depending on xref numbers. memo is shared across
+    the pages of a document, so shared resources are hashed once.
+    """
+    if xref in memo:
+        return memo[xref]
+    if xref in active:
+        return "cycle"
+    active.add(xref)
+    h = hashlib.sha256()
+    body = _PARENT_RE.sub("", doc.xref_object(xref, compressed=True))
+    h.update(_resolve_refs(doc, body, memo, active).encode("utf-8"))
+    if doc.xref_is_stream(xref):
+        h.update(doc.xref_stream_raw(xref) or b"")
+    active.discard(xref)
+    memo[xref] = h.hexdigest()
+    return memo[xref]
+
+
+def _page_resources(doc, page) -> str:
+    """
+    The page's /Resources entry, following inheritance up the page tree.
+    """
+    xref = page.xref
+    for _ in range(64):
+        kind, value = doc.xref_get_key(xref, "Resources")
+        if kind != "null":
+            return value
+        kind, parent = doc.xref_get_key(xref, "Parent")
+        if kind != "xref":
+            break
+        xref = int(parent.split()[0])
+    return ""
+
+
+def _page_hash(doc, page, memo: Optional[Dict[int, str]] = None) -> str:
+    """
+    Content hash of a page: rotation, content streams and, recursively,
+    every resource they can draw (Form XObjects, images, fonts).
+    """
+    memo = {} if memo is None else memo
+    h = hashlib.sha256()
+    h.update(str(page.rotation).encode())
+    h.update(page.read_contents())
+    h.update(_resolve_refs(doc, _page_resources(doc, page), memo, set()).encode("utf-8"))
+    return h.hexdigest()
+
+
+def analyze_pdf(pdf_path: PdfSource, min_chars: int = 100) -> Tuple[bool, List[str]]:
+    """
+    Classification and page hashes from a single open:
+    (has extractable text, content hash per page).
+    Page hashes cover the page's resources recursively, so pages whose body
+    lives in a Form XObject change hash when that form changes, while
+    re-saving the PDF (renumbered xrefs) keeps them.
+    """
+    doc = open_pdf(pdf_path)
+    try:
+        has_text, _checked = _classify(doc, min_chars)
+        memo: Dict[int, str] = {}
+        return has_text, [_page_hash(doc, page, memo) for page in doc]
+    finally:
+        doc.close()
+
+
+def extract_pages_text(pdf_path: PdfSource, page_numbers: Iterable[int],
+                       max_workers: Optional[int] = None) -> Dict[int, str]:
+    """
+    Native text for selected pages only (0-based page numbers).
+    """
+    return {n: text for n, text, _secs in iter_pdf_pages(pdf_path, page_numbers, max_workers=max_workers)}
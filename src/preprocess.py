@@ -2,21 +2,30 @@ import cv2
 import numpy as np
 from PIL import Image
 
+# Longest side preprocess_for_ocr works at; loaders use it as the decode budget
+RESIZE_MAX = 2000
+
 def pil_to_cv2(pil_img: Image.Image):
-    return cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
+    if pil_img.mode == "L":
+        # Already grayscale (e.g. decoded straight to 'L'): single-channel array
+        return np.array(pil_img)
+    return cv2.cvtColor(np.array(pil_img.convert("RGB")), cv2.COLOR_RGB2BGR)
 
 def cv2_to_pil(cv_img):
     from PIL import Image
+    if cv_img.ndim == 2:
+        return Image.fromarray(cv_img)
     cv_img = cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB)
     return Image.fromarray(cv_img)
 
-def preprocess_for_ocr(pil_img: Image.Image, denoise=True, resize_max=2000):
+def preprocess_for_ocr(pil_img: Image.Image, denoise=True, resize_max=RESIZE_MAX):
     """
     Preprocess image for better OCR:
      - convert to grayscale
      - optional denoise
      - adaptive thresholding
      - resize if large
+    Accepts RGB or grayscale ('L') input.
     Returns a PIL image ready for pytesseract.
     """
     img = pil_to_cv2(pil_img)
@@ -26,7 +35,7 @@ def preprocess_for_ocr(pil_img: Image.Image, denoise=True, resize_max=2000):
         scale = resize_max / max(h, w)
         img = cv2.resize(img, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
 
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
 
     if denoise:
         gray = cv2.fastNlMeansDenoising(gray, None, h=10, templateWindowSize=7, searchWindowSize=21)
@@ -1,22 +1,46 @@
 import os
+import re
 import time
-from typing import List
+import hashlib
+from abc import ABC, abstractmethod
+from typing import Dict, List, NamedTuple, Optional, Tuple
 import logging
+import numpy as np
 from dotenv import load_dotenv
 
+from src.llm_scheduler import (
+    JobBudget,
+    PRIORITY_BATCH,
+    estimate_tokens,
+    get_scheduler,
+)
+
 load_dotenv() #It use to fetch the env variables from .env file
 
-# Use the google genai client
+# Use the google genai client. Optional so the local extractive backend works without it.
 try:
     from google import genai
 except Exception:
     # Newer SDK uses "google.genai" or "google" package. User should install the appropriate package.
-    raise
+    genai = None
 
 DEFAULT_MODEL = "gemini-2.5-flash-lite"   # configurable; update if you have a different model
 
+MAX_RATE_LIMIT_RETRIES = 3
+# Expected response sizes, used to reserve tokens with the scheduler
+CHUNK_OUTPUT_TOKENS = 400
+SHALLOW_CHUNK_OUTPUT_TOKENS = 120
+FINAL_OUTPUT_TOKENS = 800
+
+DEFAULT_EXTRACTIVE_METHOD = "textrank"
+EXTRACTIVE_METHODS = ("textrank", "tfidf")
+# TextRank builds an n x n similarity matrix; above this many sentences use TF-IDF scoring
+TEXTRANK_MAX_SENTENCES = 2000
+
 def make_client():
     # The genai client picks up application default credentials by default.
+    if genai is None:
+        raise ImportError("google-genai is not installed. Install it or use the 'extractive' backend.")
     try:
         client = genai.Client(api_key = os.getenv('GOOGLE_GEMINI_API_KEY'))
     except Exception as e:
@@ -50,55 +74,562 @@ def chunk_text(text: str, max_chars: int = 3000):
         start = pivot
     return chunks
 
+def chunk_pages(page_texts: List[str],
+                max_chars: int = 3000,
+                groups: Optional[List[List[int]]] = None) -> List[Tuple[List[int], str]]:
+    """
+    Page-aligned chunker: packs whole pages into chunks of up to max_chars,
+    and splits a single oversized page with chunk_text.
+    groups: previous page grouping to keep, as consecutive runs covering
+    every page (see PageManifest.previous_groups), so an edited or inserted
+    page does not shift the boundaries of every chunk after it; a group that
+    no longer fits is re-packed.
+    Returns a list of (page indices, chunk text).
+    """
+    def pack(indices: List[int]) -> List[Tuple[List[int], str]]:
+        packed = []
+        current, size = [], 0
+        for i in indices:
+            page = page_texts[i].strip()
+            if not page:
+                continue
+            if len(page) > max_chars:
+                if current:
+                    packed.append((current, "\n\n".join(page_texts[j].strip() for j in current)))
+                    current, size = [], 0
+                packed.extend(([i], part) for part in chunk_text(page, max_chars=max_chars))
+                continue
+            if current and size + len(page) > max_chars:
+                packed.append((current, "\n\n".join(page_texts[j].strip() for j in current)))
+                current, size = [], 0
+            current.append(i)
+            size += len(page) + 2
+        if current:
+            packed.append((current, "\n\n".join(page_texts[j].strip() for j in current)))
+        return packed
+
+    covered = sorted(i for g in (groups or []) for i in g)
+    if not groups or covered != list(range(len(page_texts))):
+        return pack(list(range(len(page_texts))))
+
+    result = []
+    for group in groups:
+        result.extend(pack(group))
+    return result
+
+def _is_rate_limit_error(e: Exception) -> bool:
+    msg = str(e)
+    return "429" in msg or "RESOURCE_EXHAUSTED" in msg
+
+
+def generate_text(client, model: str, prompt: str,
+                  output_tokens: int,
+                  priority: str = PRIORITY_BATCH,
+                  budget: Optional[JobBudget] = None) -> str:
+    """
+    Single LLM call routed through the shared rate-limit scheduler.
+    On 429 the scheduler pauses every job, then the call is retried.
+    """
+    scheduler = get_scheduler()
+    tokens = estimate_tokens(prompt) + output_tokens
+
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        waited = scheduler.acquire(tokens, priority=priority)
+        if waited > 1.0:
+            print(f"Waited {waited:.1f}s in LLM queue ({priority})")
+        try:
+            response = client.models.generate_content(
+                model=model,
+                contents=prompt
+            )
+        except Exception as e:
+            if _is_rate_limit_error(e) and attempt < MAX_RATE_LIMIT_RETRIES:
+                scheduler.report_rate_limited()
+                continue
+            raise
+        # Only answered calls count against the job budget, not rejected (429) attempts
+        if budget is not None:
+            budget.charge(tokens)
+        out_text = getattr(response, "text", None)
+        if out_text is None:
+            # fallback parse
+            out_text = str(response)
+        return out_text
+
+
+def _focus_instruction(focus: Optional[str]) -> str:
+    if not focus:
+        return ""
+    return f"Focus only on information relevant to this question: {focus}\n"
+
+
+def _chunk_prompt(chunk: str, shallow: bool, focus: Optional[str] = None) -> str:
+    if shallow:
+        # Cheaper prompt used once the job budget runs low
+        return (
+            "You are a helpful summarization assistant. "
+            "Summarize the following document chunk in 1-2 sentences.\n"
+            f"{_focus_instruction(focus)}\n"
+            f"DOCUMENT CHUNK:\n{chunk}"
+        )
+    return (
+        "You are a helpful summarization assistant. "
+        "Summarize the following document chunk into concise bullet points and a 2–5 sentence summary. "
+        "Preserve any headings found. Output JSON with keys: 'summary' and 'bullets'.\n"
+        f"{_focus_instruction(focus)}\n"
+        f"DOCUMENT CHUNK:\n{chunk}\n\n"
+        "Respond only in JSON."
+    )
+
+
+def chunk_cache_key(*parts: str) -> str:
+    """
+    Stable key for a cached chunk summary (backend settings + chunk text).
+    """
+    return hashlib.sha1("\x00".join(parts).encode("utf-8")).hexdigest()
+
+
 def summarize_with_gemini(text: str,
-                          model: str = DEFAULT_MODEL) -> str:
-    if not text or text.strip() == "":
+                          model: str = DEFAULT_MODEL,
+                          priority: str = PRIORITY_BATCH,
+                          token_budget: Optional[int] = None,
+                          chunks: Optional[List[str]] = None,
+                          chunk_cache: Optional[Dict[str, str]] = None,
+                          focus: Optional[str] = None) -> str:
+    """
+    Two-stage summarization (per-chunk, then combine).
+    priority: scheduler class, 'interactive' or 'batch'.
+    token_budget: optional per-job token cap; when it gets tight, chunks are
+    summarized with shallower prompts and, if exhausted, skipped.
+    chunks: pre-split chunks (text is ignored when given).
+    chunk_cache: summaries keyed by chunk_cache_key; hits skip the LLM call,
+    new full-depth summaries are added to it.
+    focus: optional question; summaries then cover only what is relevant to it.
+    """
+    if chunks is None:
+        if not text or text.strip() == "":
+            return ""
+        chunks = chunk_text(text, max_chars=3000)
+    if not chunks:
         return ""
 
     client = make_client()
-    chunks = chunk_text(text, max_chars=3000)
-    print("Text split into %d chunks for summarization.", len(chunks))
+    print(f"Text split into {len(chunks)} chunks for summarization.")
+
+    budget = JobBudget(token_budget) if token_budget else None
 
     chunk_summaries = []
     for i, chunk in enumerate(chunks):
-        prompt = (
-            "You are a helpful summarization assistant. "
-            "Summarize the following document chunk into concise bullet points and a 2–5 sentence summary. "
-            "Preserve any headings found. Output JSON with keys: 'summary' and 'bullets'.\n\n"
-            f"DOCUMENT CHUNK:\n{chunk}\n\n"
-            "Respond only in JSON."
-        )
+        key = chunk_cache_key("gemini", model, focus or "", chunk)
+        if chunk_cache is not None and key in chunk_cache:
+            chunk_summaries.append(chunk_cache[key])
+            continue
+
+        shallow = False
+        if budget is not None:
+            # Keep enough in reserve for the remaining chunks and the final combine
+            remaining_chunks = len(chunks) - i
+            full_cost = estimate_tokens(chunk) + CHUNK_OUTPUT_TOKENS
+            reserve = FINAL_OUTPUT_TOKENS + (remaining_chunks - 1) * SHALLOW_CHUNK_OUTPUT_TOKENS
+            if not budget.can_afford(full_cost + reserve):
+                shallow = True
+                shallow_cost = estimate_tokens(chunk) + SHALLOW_CHUNK_OUTPUT_TOKENS
+                if not budget.can_afford(shallow_cost + FINAL_OUTPUT_TOKENS):
+                    print(f"Token budget exhausted, skipping {remaining_chunks} remaining chunk(s)")
+                    break
+        prompt = _chunk_prompt(chunk, shallow, focus=focus)
         try:
-            response = client.models.generate_content(
-                model=model,
-                contents=prompt
+            out_text = generate_text(
+                client, model, prompt,
+                output_tokens=SHALLOW_CHUNK_OUTPUT_TOKENS if shallow else CHUNK_OUTPUT_TOKENS,
+                priority=priority,
+                budget=budget
             )
-            out_text = getattr(response, "text", None)
-            if out_text is None:
-                # fallback parse
-                out_text = str(response)
             chunk_summaries.append(out_text)
+            if chunk_cache is not None and not shallow:
+                chunk_cache[key] = out_text
         except Exception as e:
-            print("Gemini summarization failed for chunk %d", i)
+            print(f"Gemini summarization failed for chunk {i}")
             chunk_summaries.append("")
 
+    if not any(s.strip() for s in chunk_summaries):
+        # Nothing to combine (budget exhausted up front or every chunk failed)
+        print("No chunk summaries produced, skipping final summarization")
+        return ""
+
     # Combine chunk summaries into a final summary prompt
     combined = "\n\n".join(chunk_summaries)
     final_prompt = (
         "You are a helpful summarization assistant. Combine the following chunk summaries into:\n"
         "1) a 4-6 sentence concise summary, and\n"
-        "2) a combined ordered list of key bullet points (max 12 bullets).\n\n"
+        "2) a combined ordered list of key bullet points (max 12 bullets).\n"
+        f"{_focus_instruction(focus)}\n"
         f"CHUNK_SUMMARIES:\n{combined}\n\nRespond in plain text."
     )
     try:
-        final_resp = client.models.generate_content(
-            model=model,
-            contents=final_prompt
+        final_text = generate_text(
+            client, model, final_prompt,
+            output_tokens=FINAL_OUTPUT_TOKENS,
+            priority=priority,
+            budget=budget
         )
-        final_text = getattr(final_resp, "text", None)
-        if final_text is None:
-            final_text = str(final_resp)
-    except ZeroDivisionError as e:
+    except Exception as e:
         print("Gemini final summarization failed.")
         final_text = combined  # fallback
     return final_text
+
+
+# ---------------------------------------------------------------------------
+# Local extractive summarization
+# ---------------------------------------------------------------------------
+
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9"\'(\[])')
+_PARAGRAPH_RE = re.compile(r'\n\s*\n')
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_PAGE_MARKER_RE = re.compile(r'^---\s*Page\s+\d+\s*---$')
+
+_STOPWORDS = frozenset("""
+a an and are as at be been but by for from had has have he her his i if in into is it its
+of on or our she that the their them there these they this to was we were which who will
+with you your not no so than then also can may such any all each other more most
+""".split())
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences. Lines inside a paragraph are joined first,
+    since OCR output wraps sentences across line breaks.
+    """
+    sentences = []
+    for para in _PARAGRAPH_RE.split(text):
+        lines = [ln.strip() for ln in para.splitlines()]
+        lines = [ln for ln in lines if ln and not _PAGE_MARKER_RE.match(ln)]
+        if not lines:
+            continue
+        joined = " ".join(lines)
+        sentences.extend(s.strip() for s in _SENTENCE_END_RE.split(joined) if s.strip())
+    return sentences
+
+
+def _tokenize(sentence: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(sentence.lower()) if t not in _STOPWORDS]
+
+
+class _SparseTfidf(NamedTuple):
+    """
+    Sentence x term TF-IDF matrix as (row, term, value) triplets sorted by
+    row, with L2-normalized rows. Memory grows with the number of tokens,
+    not sentences x vocabulary.
+    """
+    rows: np.ndarray
+    cols: np.ndarray
+    vals: np.ndarray
+    n_rows: int
+    n_cols: int
+
+    def dot(self, vector: np.ndarray) -> np.ndarray:
+        """
+        Matrix-vector product X @ vector.
+        """
+        return np.bincount(self.rows, weights=self.vals * vector[self.cols],
+                           minlength=self.n_rows).astype(np.float32)
+
+    def column_sums(self) -> np.ndarray:
+        return np.bincount(self.cols, weights=self.vals, minlength=self.n_cols)
+
+    def row(self, i: int) -> np.ndarray:
+        dense = np.zeros(self.n_cols, dtype=np.float64)
+        mask = self.rows == i
+        dense[self.cols[mask]] = self.vals[mask]
+        return dense
+
+    def gram(self, block: int = 4096) -> np.ndarray:
+        """
+        Dense X @ X.T, accumulated over column blocks (only for small row counts).
+        """
+        sim = np.zeros((self.n_rows, self.n_rows), dtype=np.float32)
+        for lo in range(0, self.n_cols, block):
+            mask = (self.cols >= lo) & (self.cols < lo + block)
+            part = np.zeros((self.n_rows, min(block, self.n_cols - lo)), dtype=np.float32)
+            part[self.rows[mask], self.cols[mask] - lo] = self.vals[mask]
+            sim += part @ part.T
+        return sim
+
+
+def _tfidf_matrix(sentences: List[str]) -> _SparseTfidf:
+    """
+    Sentence x term TF-IDF matrix (sparse) with L2-normalized rows.
+    """
+    vocab: Dict[str, int] = {}
+    rows, cols = [], []
+    for i, sent in enumerate(sentences):
+        for tok in _tokenize(sent):
+            rows.append(i)
+            cols.append(vocab.setdefault(tok, len(vocab)))
+
+    n_rows, n_cols = len(sentences), max(1, len(vocab))
+    # Collapse repeated (sentence, term) pairs into term frequencies
+    keys, tf = np.unique(np.array(rows, dtype=np.int64) * n_cols + np.array(cols, dtype=np.int64),
+                         return_counts=True)
+    rows_arr, cols_arr = keys // n_cols, keys % n_cols
+
+    df = np.bincount(cols_arr, minlength=n_cols)
+    idf = np.log((1.0 + n_rows) / (1.0 + df)) + 1.0
+    vals = tf * idf[cols_arr]
+    norms = np.sqrt(np.bincount(rows_arr, weights=vals * vals, minlength=n_rows))
+    norms[norms == 0] = 1.0
+    return _SparseTfidf(rows_arr, cols_arr, vals / norms[rows_arr], n_rows, n_cols)
+
+
+def score_sentences(sentences: List[str],
+                    method: str = DEFAULT_EXTRACTIVE_METHOD,
+                    query: Optional[str] = None) -> np.ndarray:
+    """
+    Salience score per sentence.
+    tfidf: cosine similarity to the document centroid.
+    textrank: PageRank over the sentence similarity graph.
+    query: if given, scores are blended with each sentence's similarity to it.
+    """
+    if method not in EXTRACTIVE_METHODS:
+        raise ValueError(f"Unknown extractive method '{method}', expected one of {EXTRACTIVE_METHODS}")
+    n = len(sentences)
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    if query:
+        # Vectorize the query in the same term space as the sentences
+        X = _tfidf_matrix(sentences + [query])
+        relevance = X.dot(X.row(n))[:n]
+        base = score_sentences(sentences, method=method)
+        if relevance.max() <= 0 or base.max() <= 0:
+            return base
+        return 0.3 * base / base.max() + 0.7 * relevance / relevance.max()
+
+    X = _tfidf_matrix(sentences)
+
+    if method == "tfidf" or n > TEXTRANK_MAX_SENTENCES:
+        centroid = X.column_sums()
+        norm = np.linalg.norm(centroid)
+        if norm == 0:
+            return np.zeros(n, dtype=np.float32)
+        return X.dot(centroid / norm)
+
+    sim = X.gram()
+    np.fill_diagonal(sim, 0.0)
+    row_sums = sim.sum(axis=1, keepdims=True)
+    # Sentences with no overlap spread their weight uniformly
+    transition = np.where(row_sums > 0, sim / np.where(row_sums == 0, 1.0, row_sums), 1.0 / n)
+    damping = 0.85
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(50):
+        updated = (1.0 - damping) / n + damping * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < 1e-6:
+            scores = updated
+            break
+        scores = updated
+    return scores
+
+
+def _unique_sentences(sentences: List[str]) -> List[str]:
+    """
+    First occurrence of each sentence (case/whitespace-insensitive), in order.
+    Repeated text (headers, footers, duplicated pages) would otherwise win
+    the centroid score and fill the summary with copies.
+    """
+    seen = set()
+    unique = []
+    for sent in sentences:
+        key = " ".join(sent.lower().split())
+        if key not in seen:
+            seen.add(key)
+            unique.append(sent)
+    return unique
+
+
+def top_sentences(text: str,
+                  ratio: Optional[float] = None,
+                  max_sentences: Optional[int] = None,
+                  method: str = DEFAULT_EXTRACTIVE_METHOD,
+                  query: Optional[str] = None) -> List[str]:
+    """
+    Highest-scoring sentences, returned in original document order.
+    Repeated sentences are ranked once.
+    ratio: fraction of sentences to keep; max_sentences: hard cap.
+    query: bias selection towards sentences relevant to it.
+    """
+    sentences = _unique_sentences(split_sentences(text))
+    if not sentences:
+        return []
+    keep = len(sentences)
+    if ratio is not None:
+        keep = max(1, int(round(len(sentences) * ratio)))
+    if max_sentences is not None:
+        keep = min(keep, max_sentences)
+    if keep >= len(sentences):
+        return sentences
+
+    scores = score_sentences(sentences, method=method, query=query)
+    top = np.sort(np.argsort(-scores, kind="stable")[:keep])
+    return [sentences[i] for i in top]
+
+
+def select_salient_sentences(text: str,
+                             ratio: Optional[float] = None,
+                             max_sentences: Optional[int] = None,
+                             method: str = DEFAULT_EXTRACTIVE_METHOD,
+                             query: Optional[str] = None) -> str:
+    """
+    Pre-filter for LLM input: the salient sentences joined back into text.
+    """
+    return " ".join(top_sentences(text, ratio=ratio, max_sentences=max_sentences,
+                                  method=method, query=query))
+
+
+class SummarizerBackend(ABC):
+    """
+    Base class for summarization backends used by the pipeline.
+    summarize_chunks() lets callers supply their own chunking plus a cache of
+    earlier chunk summaries (see cache_key), so only new chunks are summarized.
+    """
+    name = "base"
+
+    @abstractmethod
+    def cache_key(self, chunk: str) -> str:
+        ...
+
+    @abstractmethod
+    def summarize_chunks(self, chunks: List[str],
+                         chunk_cache: Optional[Dict[str, str]] = None) -> str:
+        ...
+
+    def summarize(self, text: str) -> str:
+        return self.summarize_chunks(chunk_text(text, max_chars=3000))
+
+
+class GeminiBackend(SummarizerBackend):
+    """
+    Gemini two-stage summarization. With prefilter_ratio set, the local
+    extractive scorer first drops low-salience sentences to shrink the prompt.
+    With focus set, summaries answer that question only.
+    """
+    name = "gemini"
+
+    def __init__(self,
+                 model: Optional[str] = None,
+                 priority: str = PRIORITY_BATCH,
+                 token_budget: Optional[int] = None,
+                 prefilter_ratio: Optional[float] = None,
+                 focus: Optional[str] = None):
+        self.model = model or DEFAULT_MODEL
+        self.priority = priority
+        self.token_budget = token_budget
+        self.prefilter_ratio = prefilter_ratio
+        self.focus = focus
+
+    def _prefilter(self, chunk: str) -> str:
+        if not self.prefilter_ratio:
+            return chunk
+        return select_salient_sentences(chunk, ratio=self.prefilter_ratio, query=self.focus)
+
+    def cache_key(self, chunk: str) -> str:
+        return chunk_cache_key("gemini", self.model, self.focus or "", self._prefilter(chunk))
+
+    def summarize_chunks(self, chunks: List[str],
+                         chunk_cache: Optional[Dict[str, str]] = None) -> str:
+        if self.prefilter_ratio:
+            before = sum(len(c) for c in chunks)
+            chunks = [self._prefilter(c) for c in chunks]
+            print(f"Pre-filter kept {sum(len(c) for c in chunks)} of {before} chars")
+        return summarize_with_gemini(
+            "",
+            model=self.model,
+            priority=self.priority,
+            token_budget=self.token_budget,
+            chunks=chunks,
+            chunk_cache=chunk_cache,
+            focus=self.focus
+        )
+
+    def summarize(self, text: str) -> str:
+        if self.prefilter_ratio:
+            # Score the whole document at once rather than chunk by chunk
+            filtered = select_salient_sentences(text, ratio=self.prefilter_ratio, query=self.focus)
+            print(f"Pre-filter kept {len(filtered)} of {len(text)} chars")
+            text = filtered
+        return summarize_with_gemini(
+            text,
+            model=self.model,
+            priority=self.priority,
+            token_budget=self.token_budget,
+            focus=self.focus
+        )
+
+
+class ExtractiveBackend(SummarizerBackend):
+    """
+    Offline summarizer: returns the most salient sentences verbatim
+    (biased towards the focus question when one is set).
+    """
+    name = "extractive"
+
+    def __init__(self, method: Optional[str] = None, max_sentences: int = 8,
+                 focus: Optional[str] = None):
+        self.method = method or DEFAULT_EXTRACTIVE_METHOD
+        if self.method not in EXTRACTIVE_METHODS:
+            raise ValueError(f"Unknown extractive method '{self.method}', expected one of {EXTRACTIVE_METHODS}")
+        self.max_sentences = max_sentences
+        self.focus = focus
+
+    def cache_key(self, chunk: str) -> str:
+        return chunk_cache_key("extractive", self.method, str(self.max_sentences),
+                               self.focus or "", chunk)
+
+    def summarize_chunks(self, chunks: List[str],
+                         chunk_cache: Optional[Dict[str, str]] = None) -> str:
+        # Stage 1 keeps the best sentences of each chunk, stage 2 ranks those globally
+        picks = []
+        for chunk in chunks:
+            key = self.cache_key(chunk)
+            if chunk_cache is not None and key in chunk_cache:
+                picks.append(chunk_cache[key])
+                continue
+            pick = " ".join(top_sentences(chunk, max_sentences=self.max_sentences,
+                                          method=self.method, query=self.focus))
+            if chunk_cache is not None:
+                chunk_cache[key] = pick
+            picks.append(pick)
+        return self.summarize("\n\n".join(picks))
+
+    def summarize(self, text: str) -> str:
+        if not text or text.strip() == "":
+            return ""
+        sentences = top_sentences(text, max_sentences=self.max_sentences,
+                                  method=self.method, query=self.focus)
+        return "\n".join(f"- {sent}" for sent in sentences)
+
+
+BACKENDS = ("gemini", "extractive")
+
+
+def get_backend(name: str = "gemini",
+                model: Optional[str] = None,
+                priority: str = PRIORITY_BATCH,
+                token_budget: Optional[int] = None,
+                prefilter_ratio: Optional[float] = None,
+                focus: Optional[str] = None) -> SummarizerBackend:
+    """
+    Build a summarizer backend by name.
+    For 'gemini', model is the Gemini model; for 'extractive', it is the
+    scoring method ('textrank' or 'tfidf'; anything else falls back to the default).
+    focus: optional question for query-focused summaries.
+    """
+    if name == "gemini":
+        return GeminiBackend(model=model, priority=priority, token_budget=token_budget,
+                             prefilter_ratio=prefilter_ratio, focus=focus)
+    if name == "extractive":
+        if model and model not in EXTRACTIVE_METHODS:
+            # model_name is shared with the Gemini backend; a model id is not a scoring method
+            print(f"'{model}' is not an extractive method, using '{DEFAULT_EXTRACTIVE_METHOD}'")
+            model = None
+        return ExtractiveBackend(method=model, focus=focus)
+    raise ValueError(f"Unknown summarizer backend '{name}', expected one of {BACKENDS}")
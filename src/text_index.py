@@ -0,0 +1,173 @@
+import re
+import math
+import time
+import sqlite3
+import logging
+from collections import Counter
+from typing import Dict, List
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+_QUERY_STOPWORDS = frozenset("""
+a an and are as at be by for from how in is it of on or that the this to was what when
+where which who why with about does do did any all
+""".split())
+
+
+def query_terms(query: str) -> List[str]:
+    """
+    Lower-cased search terms of a free-text question, stopwords removed.
+    """
+    terms = [t for t in _TERM_RE.findall(query.lower()) if t not in _QUERY_STOPWORDS]
+    return terms or _TERM_RE.findall(query.lower())
+
+
+def fts5_available() -> bool:
+    try:
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+        conn.close()
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+class TextIndex:
+    """
+    Persistent full-text index of extracted page text, keyed by file hash and page.
+    Uses SQLite FTS5 with BM25 ranking; on SQLite builds without FTS5 it falls
+    back to a plain inverted index (term postings) with the same interface.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.use_fts = fts5_available()
+        self._create_tables()
+
+    def _create_tables(self):
+        c = self.conn
+        c.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "file_hash TEXT PRIMARY KEY, path TEXT, pages INTEGER, indexed_at REAL)"
+        )
+        if self.use_fts:
+            c.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5("
+                "text, file_hash UNINDEXED, page UNINDEXED, path UNINDEXED, "
+                "tokenize='porter unicode61')"
+            )
+        else:
+            c.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "file_hash TEXT, page INTEGER, path TEXT, text TEXT, length INTEGER, "
+                "PRIMARY KEY (file_hash, page))"
+            )
+            c.execute(
+                "CREATE TABLE IF NOT EXISTS postings ("
+                "term TEXT, file_hash TEXT, page INTEGER, tf INTEGER)"
+            )
+            c.execute("CREATE INDEX IF NOT EXISTS postings_term ON postings(term)")
+        c.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def has_document(self, file_hash: str) -> bool:
+        row = self.conn.execute(
+            "SELECT 1 FROM documents WHERE file_hash = ?", (file_hash,)
+        ).fetchone()
+        return row is not None
+
+    def _remove(self, file_hashes: List[str]):
+        for h in file_hashes:
+            self.conn.execute("DELETE FROM pages WHERE file_hash = ?", (h,))
+            if not self.use_fts:
+                self.conn.execute("DELETE FROM postings WHERE file_hash = ?", (h,))
+            self.conn.execute("DELETE FROM documents WHERE file_hash = ?", (h,))
+
+    def add_document(self, file_hash: str, path: str, page_texts: List[str]):
+        """
+        Index every page of a document. Older versions indexed under the same
+        path are replaced.
+        """
+        stale = [r[0] for r in self.conn.execute(
+            "SELECT file_hash FROM documents WHERE path = ? OR file_hash = ?", (path, file_hash)
+        )]
+        self._remove(stale)
+
+        for page, text in enumerate(page_texts):
+            if not text.strip():
+                continue
+            if self.use_fts:
+                self.conn.execute(
+                    "INSERT INTO pages (text, file_hash, page, path) VALUES (?, ?, ?, ?)",
+                    (text, file_hash, page, path)
+                )
+            else:
+                terms = Counter(_TERM_RE.findall(text.lower()))
+                self.conn.execute(
+                    "INSERT INTO pages (file_hash, page, path, text, length) VALUES (?, ?, ?, ?, ?)",
+                    (file_hash, page, path, text, sum(terms.values()))
+                )
+                self.conn.executemany(
+                    "INSERT INTO postings (term, file_hash, page, tf) VALUES (?, ?, ?, ?)",
+                    [(t, file_hash, page, n) for t, n in terms.items()]
+                )
+        self.conn.execute(
+            "INSERT INTO documents (file_hash, path, pages, indexed_at) VALUES (?, ?, ?, ?)",
+            (file_hash, path, len(page_texts), time.time())
+        )
+        self.conn.commit()
+
+    def search(self, query: str, limit: int = 8) -> List[Dict]:
+        """
+        Top-ranked pages for a free-text query, best first.
+        Each hit: {'file_hash', 'path', 'page', 'text', 'score'} (higher score = better).
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+        if self.use_fts:
+            match = " OR ".join('"' + t.replace('"', '""') + '"' for t in terms)
+            rows = self.conn.execute(
+                "SELECT file_hash, path, page, text, bm25(pages) AS rank FROM pages "
+                "WHERE pages MATCH ? ORDER BY rank LIMIT ?",
+                (match, limit)
+            ).fetchall()
+            # bm25() is lower-is-better; flip it so callers can treat it as a score
+            return [
+                {"file_hash": r[0], "path": r[1], "page": int(r[2]), "text": r[3], "score": -r[4]}
+                for r in rows
+            ]
+        return self._search_postings(terms, limit)
+
+    def _search_postings(self, terms: List[str], limit: int, k1: float = 1.2, b: float = 0.75) -> List[Dict]:
+        n_pages, avg_len = self.conn.execute("SELECT COUNT(*), AVG(length) FROM pages").fetchone()
+        if not n_pages:
+            return []
+        avg_len = avg_len or 1.0
+        scores: Dict = {}
+        for term in set(terms):
+            rows = self.conn.execute(
+                "SELECT p.file_hash, p.page, p.tf, d.length FROM postings p "
+                "JOIN pages d ON d.file_hash = p.file_hash AND d.page = p.page WHERE p.term = ?",
+                (term,)
+            ).fetchall()
+            if not rows:
+                continue
+            idf = math.log(1.0 + (n_pages - len(rows) + 0.5) / (len(rows) + 0.5))
+            for file_hash, page, tf, length in rows:
+                norm = tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_len))
+                scores[(file_hash, page)] = scores.get((file_hash, page), 0.0) + idf * norm
+
+        hits = []
+        for (file_hash, page), score in sorted(scores.items(), key=lambda kv: -kv[1])[:limit]:
+            path, text = self.conn.execute(
+                "SELECT path, text FROM pages WHERE file_hash = ? AND page = ?", (file_hash, page)
+            ).fetchone()
+            hits.append({"file_hash": file_hash, "path": path, "page": page, "text": text, "score": score})
+        return hits
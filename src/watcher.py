@@ -0,0 +1,220 @@
+import os
+import json
+import hashlib
+import time
+import threading
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from src.document_scanner import INPUT_EXTS, scan_and_summarize
+from src.manifest import file_hash
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STATE_FILE_NAME = ".watch_state.json"
+# A file whose processing raised is retried this many times (with doubling
+# delays) before it is left alone until its content changes
+MAX_RETRIES = 3
+RETRY_DELAY_SECONDS = 60.0
+
+
+class FolderWatcher:
+    """
+    Long-running watch mode for drop folders.
+
+    Polls the input directories with os.scandir (one stat per entry, no file
+    reads), waits until a file's size and mtime have been stable for
+    settle_seconds so half-copied scans are skipped, and hands new or changed
+    files to a bounded worker pool. Change detection is size/mtime first and a
+    content hash second, so touched-but-identical files are not reprocessed.
+    Files that fail (e.g. missing API key or tesseract) are retried with backoff.
+    The poll interval backs off while nothing changes to keep idle CPU near zero.
+    """
+
+    def __init__(self,
+                 input_dirs: List[str],
+                 output_dir: str,
+                 max_workers: int = 2,
+                 poll_interval: float = 1.0,
+                 max_poll_interval: float = 10.0,
+                 settle_seconds: float = 3.0,
+                 **scan_kwargs):
+        self.input_dirs = [os.path.abspath(d) for d in input_dirs]
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.settle_seconds = settle_seconds
+        self.scan_kwargs = scan_kwargs
+
+        self.state_path = os.path.join(output_dir, STATE_FILE_NAME)
+        self._state: Dict[str, Dict] = self._load_state()
+        self._state_lock = threading.Lock()
+        # path -> (size, mtime, first time seen with that size/mtime)
+        self._pending: Dict[str, Tuple[int, float, float]] = {}
+        self._in_flight: Dict[str, Future] = {}
+        self._stop = threading.Event()
+
+    def _load_state(self) -> Dict[str, Dict]:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _list_files(self) -> Dict[str, Tuple[int, float]]:
+        found = {}
+        for d in self.input_dirs:
+            try:
+                with os.scandir(d) as it:
+                    for entry in it:
+                        if entry.name.startswith(".") or not entry.is_file():
+                            continue
+                        if not entry.name.lower().endswith(INPUT_EXTS):
+                            continue
+                        st = entry.stat()
+                        found[entry.path] = (st.st_size, st.st_mtime)
+            except OSError as e:
+                logger.warning(f"Cannot scan {d}: {e}")
+        return found
+
+    def _ready_files(self, now: float, limit: int) -> List[str]:
+        """
+        Up to `limit` files that are new or modified since last processed and
+        have stopped changing. Settled files beyond the limit stay pending.
+        """
+        ready = []
+        found = self._list_files()
+        for path in list(self._pending):
+            if path not in found:
+                del self._pending[path]
+
+        for path, (size, mtime) in found.items():
+            if path in self._in_flight:
+                continue
+            known = self._state.get(path)
+            if known and known["size"] == size and known["mtime"] == mtime:
+                self._pending.pop(path, None)
+                if self._retry_due(known, now) and len(ready) < limit:
+                    ready.append(path)
+                continue
+
+            seen = self._pending.get(path)
+            if seen is None or seen[0] != size or seen[1] != mtime:
+                # New or still being written: restart the settle timer
+                self._pending[path] = (size, mtime, now)
+                continue
+            if size == 0 or now - seen[2] < self.settle_seconds or len(ready) >= limit:
+                continue
+
+            del self._pending[path]
+            digest = file_hash(path)
+            if known and known.get("hash") == digest and not known.get("failures"):
+                # Touched or copied over with identical content
+                with self._state_lock:
+                    self._state[path] = {"size": size, "mtime": mtime, "hash": digest}
+                    self._save_state()
+                continue
+            ready.append(path)
+        return ready
+
+    @staticmethod
+    def _retry_due(known: Dict, now: float) -> bool:
+        failures = known.get("failures", 0)
+        return 0 < failures < MAX_RETRIES and now >= known.get("retry_at", 0.0)
+
+    def _output_paths(self, path: str) -> Tuple[str, str]:
+        # Full file name plus a tag of its folder: scan.pdf / scan.jpg, or the
+        # same name in two input dirs, must not overwrite each other's outputs
+        p = Path(path)
+        dir_tag = hashlib.sha1(str(p.parent).encode("utf-8")).hexdigest()[:8]
+        base = f"{p.name}_{dir_tag}"
+        return (os.path.join(self.output_dir, f"{base}_text.txt"),
+                os.path.join(self.output_dir, f"{base}_summary.txt"))
+
+    def _process(self, path: str):
+        try:
+            # Record what was actually processed, even if the file changes meanwhile
+            st = os.stat(path)
+            digest = file_hash(path)
+        except OSError as e:
+            logger.warning(f"Skipping {path}, it can no longer be read: {e}")
+            return
+        entry = {"size": st.st_size, "mtime": st.st_mtime, "hash": digest}
+        save_text, save_summary = self._output_paths(path)
+        start = time.time()
+        try:
+            scan_and_summarize(
+                input_paths=[path],
+                save_text=save_text,
+                save_summary=save_summary,
+                **self.scan_kwargs
+            )
+            logger.info(f"Processed {path} in {time.time() - start:.1f}s")
+        except Exception as e:
+            # Not marked done: retried with doubling delays, then left until it changes
+            known = self._state.get(path) or {}
+            failures = known.get("failures", 0) + 1 if known.get("hash") == digest else 1
+            entry["failures"] = failures
+            entry["retry_at"] = time.time() + RETRY_DELAY_SECONDS * 2 ** (failures - 1)
+            if failures < MAX_RETRIES:
+                logger.error(f"Failed to process {path} (attempt {failures}/{MAX_RETRIES}), "
+                             f"retrying in {entry['retry_at'] - time.time():.0f}s: {e}")
+            else:
+                logger.error(f"Failed to process {path} after {failures} attempts, "
+                             f"skipping until it changes: {e}")
+        with self._state_lock:
+            self._state[path] = entry
+            self._save_state()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        """
+        Watch until stop() is called or the process is interrupted.
+        """
+        Path(self.output_dir).mkdir(parents=True, exist_ok=True)
+        print(f"Watching {self.input_dirs} -> {self.output_dir} (Ctrl+C to stop)")
+        interval = self.poll_interval
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            try:
+                while not self._stop.is_set():
+                    for path in [p for p, f in self._in_flight.items() if f.done()]:
+                        del self._in_flight[path]
+
+                    # Bounded queue: at most two files per worker submitted at a time
+                    capacity = 2 * self.max_workers - len(self._in_flight)
+                    ready = self._ready_files(time.time(), limit=max(0, capacity))
+                    for path in ready:
+                        print(f"Detected new/changed file: {path}")
+                        self._in_flight[path] = pool.submit(self._process, path)
+
+                    if ready or self._pending or self._in_flight:
+                        interval = self.poll_interval
+                    else:
+                        interval = min(interval * 2, self.max_poll_interval)
+                    self._stop.wait(interval)
+            except KeyboardInterrupt:
+                print("Stopping watcher, waiting for running jobs to finish")
+
+
+def watch_folders(input_dirs: List[str], output_dir: str,
+                  max_workers: int = 2, **scan_kwargs):
+    """
+    Run the watch-folder daemon: process new/modified files in input_dirs
+    and write <file name>_<folder tag>_text.txt / ..._summary.txt per file
+    into output_dir.
+    scan_kwargs are passed to scan_and_summarize.
+    """
+    FolderWatcher(input_dirs, output_dir, max_workers=max_workers, **scan_kwargs).run()